@@ -0,0 +1,81 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from app.config import settings
+
+
+def build_password_helper() -> PasswordHelper:
+    argon2 = Argon2Hasher(
+        time_cost=settings.argon2_time_cost,
+        memory_cost=settings.argon2_memory_cost,
+        parallelism=settings.argon2_parallelism,
+    )
+    bcrypt = BcryptHasher(rounds=settings.bcrypt_rounds)
+    # The first hasher makes new hashes. The other still verifies old ones, and
+    # any hash made with another algorithm or other parameters is replaced on
+    # the user's next login.
+    if settings.password_hash_algorithm == "argon2":
+        hashers = (argon2, bcrypt)
+    else:
+        hashers = (bcrypt, argon2)
+    return PasswordHelper(PasswordHash(hashers))
+
+
+class PasswordHasherPool:
+    """Password hashing and verification off the event loop.
+
+    bcrypt and argon2-cffi release the GIL while they work, so a thread pool
+    runs them in parallel and other requests keep being served. At most
+    ``workers`` hashes run at once and ``queue_size`` more may wait; further
+    callers get 503 with Retry-After instead of piling up behind them. With
+    0 workers hashing runs inline on the event loop.
+    """
+
+    def __init__(self, helper: PasswordHelper, workers: int, queue_size: int):
+        self.helper = helper
+        self.capacity = workers + queue_size
+        self._pending = 0
+        self._executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+            if workers > 0
+            else None
+        )
+
+    async def _run(self, function, *args):
+        if self._executor is None:
+            return function(*args)
+        if self._pending >= self.capacity:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many logins in progress, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, function, *args
+            )
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.helper.hash, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        return await self._run(self.helper.verify_and_update, password, hashed_password)
+
+
+password_pool = PasswordHasherPool(
+    build_password_helper(),
+    workers=settings.password_hash_workers,
+    queue_size=settings.password_hash_queue,
+)
@@ -0,0 +1,110 @@
+import time
+from typing import Optional
+
+import jwt
+from beanie import PydanticObjectId
+from bson.errors import InvalidId
+from fastapi_users import BaseUserManager, exceptions
+from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
+
+from app.cache import cache
+from app.config import settings
+from app.metrics import record_cache_lookup
+from app.models.user import User
+
+# Claims copied from the user into new tokens when JWT_TRUSTED_CLAIMS is on.
+CLAIMS = {
+    "email": "email",
+    "username": "username",
+    "active": "is_active",
+    "superuser": "is_superuser",
+    "verified": "is_verified",
+}
+
+
+def _user_namespace(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+async def invalidate_user(user_id) -> None:
+    """Drop every cached copy of a user, whichever token it was cached under."""
+    await cache.invalidate(_user_namespace(str(user_id)))
+
+
+class UserTokenStrategy(JWTStrategy):
+    """JWTs stamped with their issue time, plus the user's identity and flags
+    when JWT_TRUSTED_CLAIMS is on. Reading them loads the user as usual."""
+
+    async def write_token(self, user: User) -> str:
+        data = {
+            "sub": str(user.id),
+            "aud": self.token_audience,
+            "iat": int(time.time()),
+        }
+        if settings.jwt_trusted_claims:
+            data.update(
+                {claim: getattr(user, field) for claim, field in CLAIMS.items()}
+            )
+        return generate_jwt(
+            data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm
+        )
+
+
+class CachedUserStrategy(UserTokenStrategy):
+    """Resolves the user for the app's own routes without a MongoDB read.
+
+    A token carrying trusted claims is turned into a user directly, so profile
+    changes and deactivation only show up once it expires. Otherwise users are
+    cached for USER_CACHE_TTL seconds under their id and the token's issue
+    time; UserManager invalidates them on update, verification, password reset
+    and deletion. The users returned have no password hash and must not be
+    saved; the /users routes keep loading full documents.
+    """
+
+    async def read_token(
+        self, token: Optional[str], user_manager: BaseUserManager
+    ) -> Optional[User]:
+        if token is None:
+            return None
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+            user_id = data.get("sub")
+            if user_id is None:
+                return None
+            if settings.jwt_trusted_claims and all(claim in data for claim in CLAIMS):
+                return User.model_construct(
+                    id=PydanticObjectId(user_id),
+                    hashed_password="",
+                    **{field: data[claim] for claim, field in CLAIMS.items()},
+                )
+        except (jwt.PyJWTError, InvalidId):
+            return None
+
+        if settings.user_cache_ttl <= 0:
+            return await _load(user_id, user_manager)
+
+        namespace = _user_namespace(user_id)
+        key = await cache.versioned_key(f"{namespace}:{data.get('iat', '')}", namespace)
+        cached = await cache.get(key)
+        record_cache_lookup("user", cached is not None)
+        if cached is not None:
+            return User.model_validate({**cached, "hashed_password": ""})
+
+        user = await _load(user_id, user_manager)
+        if user is not None:
+            await cache.set(
+                key,
+                user.model_dump(mode="json", exclude={"hashed_password"}),
+                ttl=settings.user_cache_ttl,
+            )
+        return user
+
+
+async def _load(user_id: str, user_manager: BaseUserManager) -> Optional[User]:
+    try:
+        return await user_manager.get(user_manager.parse_id(user_id))
+    except (exceptions.UserNotExists, exceptions.InvalidID, ValueError):
+        return None
@@ -1,8 +1,9 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from bson import ObjectId
 from fastapi import Depends, Request
-from fastapi_users import BaseUserManager, FastAPIUsers
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users import BaseUserManager, FastAPIUsers, exceptions
 from fastapi_users.authentication import (
     AuthenticationBackend,
     BearerTransport,
@@ -10,6 +11,8 @@ from fastapi_users.authentication import (
 )
 from fastapi_users.db import BeanieUserDatabase
 
+from app.auth.passwords import password_pool
+from app.auth.tokens import CachedUserStrategy, UserTokenStrategy, invalidate_user
 from app.config import settings
 from app.models.user import User
 
@@ -18,6 +21,9 @@ class UserManager(BaseUserManager[User, str]):
     reset_password_token_secret = settings.secret_key
     verification_token_secret = settings.secret_key
 
+    def __init__(self, user_db, password_helper=None):
+        super().__init__(user_db, password_helper or password_pool.helper)
+
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         print(f"User {user.id} has registered.")
 
@@ -28,6 +34,75 @@ class UserManager(BaseUserManager[User, str]):
         except Exception:
             raise ValueError("Invalid ID format")
 
+    # Registration, login and password changes hash through password_pool, off
+    # the event loop; the rest of the flow is BaseUserManager's.
+    async def create(
+        self, user_create, safe: bool = False, request: Optional[Request] = None
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await password_pool.hash(password)
+
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(
+        self, credentials: OAuth2PasswordRequestForm
+    ) -> Optional[User]:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Hash anyway so unknown emails take as long as wrong passwords.
+            await password_pool.hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = await password_pool.verify_and_update(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        # Rehashed when the hash settings changed since the password was set.
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+        return user
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        update_dict = dict(update_dict)
+        password = update_dict.pop("password", None)
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict["hashed_password"] = await password_pool.hash(password)
+        return await super()._update(user, update_dict)
+
+    # Cached users (see CachedUserStrategy) must not outlive these changes.
+    async def on_after_update(
+        self, user: User, update_dict: dict, request: Optional[Request] = None
+    ):
+        await invalidate_user(user.id)
+
+    async def on_after_verify(self, user: User, request: Optional[Request] = None):
+        await invalidate_user(user.id)
+
+    async def on_after_reset_password(
+        self, user: User, request: Optional[Request] = None
+    ):
+        await invalidate_user(user.id)
+
+    async def delete(self, user: User, request: Optional[Request] = None):
+        await super().delete(user, request)
+        await invalidate_user(user.id)
+
 
 async def get_user_db():
     yield BeanieUserDatabase(User)
@@ -38,7 +113,11 @@ async def get_user_manager(user_db: BeanieUserDatabase = Depends(get_user_db)):
 
 
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=settings.secret_key, lifetime_seconds=3600)
+    return UserTokenStrategy(secret=settings.secret_key, lifetime_seconds=3600)
+
+
+def get_cached_jwt_strategy() -> JWTStrategy:
+    return CachedUserStrategy(secret=settings.secret_key, lifetime_seconds=3600)
 
 
 bearer_transport = BearerTransport(tokenUrl="auth/jwt/login")
@@ -49,9 +128,28 @@ auth_backend = AuthenticationBackend(
     get_strategy=get_jwt_strategy,
 )
 
+# Same tokens, resolved through the user cache or trusted claims. Only the
+# app's own routes use it; the /users routes update and save the user they
+# get, so they keep loading it from MongoDB.
+cached_auth_backend = AuthenticationBackend(
+    name="jwt-cached",
+    transport=bearer_transport,
+    get_strategy=get_cached_jwt_strategy,
+)
+
 fastapi_users = FastAPIUsers[User, str](
     get_user_manager,
-    [auth_backend],
+    [auth_backend, cached_auth_backend],
 )
 
-current_active_user = fastapi_users.current_user(active=True)
+
+def app_backends():
+    return [cached_auth_backend]
+
+
+current_active_user = fastapi_users.current_user(
+    active=True, get_enabled_backends=app_backends
+)
+current_superuser = fastapi_users.current_user(
+    active=True, superuser=True, get_enabled_backends=app_backends
+)
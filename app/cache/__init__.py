@@ -0,0 +1,14 @@
+from .base import CacheBackend
+from .default import cache, create_cache
+from .http import cached_json_response
+from .memory import MemoryCache
+from .redis_backend import RedisCache
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCache",
+    "RedisCache",
+    "cache",
+    "cached_json_response",
+    "create_cache",
+]
@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+
+
+class CacheBackend(ABC):
+    """Async key/value cache with TTLs and versioned namespaces.
+
+    Values must be JSON-serializable so that shared backends can store them.
+    Namespace versions are embedded in cache keys by callers; invalidating a
+    namespace bumps its version, which orphans every key built under the old
+    one. Only a ``shared`` backend does so in all workers at once.
+    """
+
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None): ...
+
+    @abstractmethod
+    async def delete(self, key: str): ...
+
+    @abstractmethod
+    async def versions(self, *namespaces: str) -> List[int]: ...
+
+    @abstractmethod
+    async def invalidate(self, *namespaces: str): ...
+
+    async def versioned_key(self, key: str, *namespaces: str) -> str:
+        versions = await self.versions(*namespaces)
+        tags = ",".join(f"{ns}@{v}" for ns, v in zip(namespaces, versions))
+        return f"{key}#{tags}"
+
+    async def close(self):
+        pass
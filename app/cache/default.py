@@ -0,0 +1,19 @@
+from app.config import settings
+
+from .base import CacheBackend
+from .memory import MemoryCache
+from .redis_backend import RedisCache
+
+
+def create_cache() -> CacheBackend:
+    if settings.cache_backend == "redis":
+        return RedisCache.from_url(
+            settings.redis_url, default_ttl=settings.response_cache_ttl
+        )
+    return MemoryCache(
+        max_entries=settings.response_cache_max_entries,
+        default_ttl=settings.response_cache_ttl,
+    )
+
+
+cache = create_cache()
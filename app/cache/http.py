@@ -0,0 +1,96 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, List, Optional
+
+from fastapi import Request, Response
+
+from app.cache.default import cache
+from app.config import settings
+from app.metrics import record_cache_lookup
+from app.responses import render_json
+
+
+def _last_modified(payload: Any) -> Optional[datetime]:
+    if getattr(payload, "updated_at", None):
+        return payload.updated_at
+    items = getattr(payload, "items", None)
+    if isinstance(items, list):
+        dates = [item.updated_at for item in items if getattr(item, "updated_at", None)]
+        return max(dates) if dates else None
+    return None
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.replace(microsecond=0), usegmt=True)
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(
+                if_modified_since
+            )
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def cached_json_response(
+    request: Request,
+    namespaces: List[str],
+    loader: Callable[[], Awaitable[Any]],
+    exclude_unset: bool = False,
+) -> Optional[Response]:
+    """Serve ``loader()`` as JSON through the response cache.
+
+    The cache key is the route plus its query string and the current version
+    of every namespace, so invalidating a namespace drops all of its entries.
+    Returns None when the loader finds nothing. ``exclude_unset`` drops model
+    fields that were never set, as sparse fieldsets need.
+    """
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    key = await cache.versioned_key(f"response:{request.url.path}?{query}", *namespaces)
+
+    entry = await cache.get(key)
+    record_cache_lookup("response", entry is not None)
+    if entry is None:
+        payload = await loader()
+        if payload is None:
+            return None
+        body = render_json(payload, exclude_unset)
+        # Hash the body rather than trusting updated_at alone: comment counts
+        # change without touching the post's updated_at.
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        modified = _last_modified(payload)
+        entry = {
+            "body": body.decode(),
+            "etag": etag,
+            "last_modified": _http_date(modified) if modified else None,
+        }
+        await cache.set(key, entry)
+
+    etag, last_modified = entry["etag"], entry["last_modified"]
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.http_cache_max_age}, "
+        "must-revalidate",
+    }
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=entry["body"], media_type="application/json", headers=headers
+    )
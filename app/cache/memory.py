@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from app.cache.base import CacheBackend
+
+
+class MemoryCache(CacheBackend):
+    """Process-local TTL + LRU cache; invalidations stay in this worker.
+
+    Namespace versions are kept in an LRU of the same size as the entries.
+    They are drawn from one counter, and a namespace that was evicted (or
+    never invalidated) reads as the highest version evicted so far, so it
+    cannot go back to a version its stale entries were built under.
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def versions(self, *namespaces: str) -> List[int]:
+        versions = []
+        for namespace in namespaces:
+            version = self._versions.get(namespace)
+            if version is None:
+                versions.append(self._floor)
+            else:
+                self._versions.move_to_end(namespace)
+                versions.append(version)
+        return versions
+
+    async def invalidate(self, *namespaces: str):
+        # Orphaned entries are reclaimed by LRU eviction.
+        self._clock += 1
+        for namespace in namespaces:
+            self._versions[namespace] = self._clock
+            self._versions.move_to_end(namespace)
+        while len(self._versions) > self.max_entries:
+            _, version = self._versions.popitem(last=False)
+            self._floor = max(self._floor, version)
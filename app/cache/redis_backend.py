@@ -0,0 +1,106 @@
+import json
+import logging
+import secrets
+from typing import Any, List, Optional
+
+from app.cache.base import CacheBackend
+from app.metrics import record_cache_error
+
+try:
+    from redis import RedisError
+    from redis import asyncio as redis_asyncio
+except ImportError:  # pragma: no cover - optional dependency
+    redis_asyncio = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCache(CacheBackend):
+    """Cache shared by every worker through a Redis-protocol server.
+
+    Any redis.asyncio-compatible client works; benchmarks.checks runs it
+    against ``fakeredis.FakeAsyncRedis()``.
+
+    The cache is an optimisation, so a failing server does not fail requests:
+    reads miss, writes are dropped, and both are logged and counted in
+    cache_errors_total. A failed invalidation leaves the old entries to their
+    TTL.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = "blog:", default_ttl: float = 30.0):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCache":
+        if redis_asyncio is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        return cls(redis_asyncio.from_url(url), **kwargs)
+
+    def _version_key(self, namespace: str) -> str:
+        return f"{self.prefix}version:{namespace}"
+
+    def _failed(self, operation: str, exc: Exception):
+        record_cache_error(operation)
+        logger.warning("Redis cache %s failed: %s", operation, exc)
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self.client.get(self.prefix + key)
+        except RedisError as exc:
+            self._failed("get", exc)
+            return None
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        try:
+            await self.client.set(
+                self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000))
+            )
+        except RedisError as exc:
+            self._failed("set", exc)
+
+    async def delete(self, key: str):
+        try:
+            await self.client.delete(self.prefix + key)
+        except RedisError as exc:
+            self._failed("delete", exc)
+
+    async def versions(self, *namespaces: str) -> List[int]:
+        if not namespaces:
+            return []
+        try:
+            values = await self.client.mget(
+                [self._version_key(namespace) for namespace in namespaces]
+            )
+        except RedisError as exc:
+            self._failed("versions", exc)
+            # Versions nobody else uses: keys built from them always miss.
+            return [secrets.randbits(62) for _ in namespaces]
+        return [int(value or 0) for value in values]
+
+    async def invalidate(self, *namespaces: str):
+        if not namespaces:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for namespace in namespaces:
+                    pipe.incr(self._version_key(namespace))
+                await pipe.execute()
+        except RedisError as exc:
+            record_cache_error("invalidate")
+            logger.error(
+                "Invalidating %s failed, cached entries stay until they expire: %s",
+                ", ".join(namespaces),
+                exc,
+            )
+
+    async def close(self):
+        await self.client.aclose()
@@ -1,10 +1,121 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+ReadPreferenceName = Literal[
+    "primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"
+]
+
 
 class Settings(BaseSettings):
     mongodb_url: str = "mongodb://localhost:27017"
     database_name: str = "blog_db"
     secret_key: str = "your-secret-key-change-in-production"
+    # Driver connection pool and routing. Compressors need server support and
+    # the matching package (zstandard for zstd, python-snappy for snappy),
+    # e.g. "zstd,snappy".
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_server_selection_timeout_ms: int = 30000
+    mongo_compressors: str = ""
+    mongo_read_preference: ReadPreferenceName = "primary"
+    # "snapshot" only works inside transactions and "linearizable" only on the
+    # primary, so neither can be the client-wide default.
+    mongo_read_concern: Optional[Literal["local", "available", "majority"]] = None
+    # Listings, search and stats can read from secondaries at the cost of
+    # replication lag; everything else follows mongo_read_preference.
+    listing_read_preference: ReadPreferenceName = "primary"
+    # Command latency and pool checkout listeners, reported by /health/mongo.
+    mongo_monitoring: bool = True
+    # Opt-in profiler: logs requests slower than slow_request_ms with their
+    # MongoDB vs Python time, and keeps the slowest query shapes with their
+    # explain() plans (executionStats, so each new shape runs once more).
+    # Reported by /health/mongo/slow.
+    profiling_enabled: bool = False
+    slow_request_ms: float = 500.0
+    slow_query_ms: float = 100.0
+    profiling_max_shapes: int = 200
+    # Build declared indexes at startup. Turn off where index builds on large
+    # collections are scheduled by hand (python manage.py indexes --build);
+    # missing indexes are then only reported.
+    create_indexes_on_startup: bool = True
+    # Follow a change stream on categories so every worker sees new ones.
+    # Requires a replica set; standalone servers keep the startup snapshot.
+    category_change_stream: bool = False
+    # Seconds a listing total is reused before it is counted again; 0 disables.
+    # Writes invalidate cached totals immediately.
+    count_cache_ttl: float = 5.0
+    # In-process title index behind search mode=prefix, reloaded periodically
+    # so posts written by other workers show up.
+    title_index_enabled: bool = False
+    title_index_refresh_seconds: float = 60.0
+    # "memory" keeps cached responses and counts per worker; "redis" shares
+    # them (and their invalidations) between every worker and container.
+    cache_backend: Literal["memory", "redis"] = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    # Rendered GET responses for posts, categories and stats.
+    response_cache_ttl: float = 30.0
+    response_cache_max_entries: int = 1024
+    # max-age sent to browsers/CDNs; they revalidate with the ETag afterwards.
+    http_cache_max_age: int = 0
+    # Seconds the user behind a JWT is cached for the app's own routes; 0
+    # loads it on every request. Updates, verification, password resets and
+    # deletions through the user manager invalidate it immediately.
+    user_cache_ttl: float = 30.0
+    # Put username, email and the active/superuser/verified flags into new
+    # tokens and trust them instead of loading the user at all. Changes to the
+    # user, deactivation included, then only apply once the token expires.
+    jwt_trusted_claims: bool = False
+    # Hashes for new passwords. Existing hashes made with the other algorithm
+    # or other parameters still verify, and are replaced on the next login.
+    password_hash_algorithm: Literal["argon2", "bcrypt"] = "argon2"
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+    bcrypt_rounds: int = 12
+    # Threads hashing passwords off the event loop, and how many more hashes
+    # may wait for one before logins are answered with 503; 0 workers hashes
+    # on the event loop.
+    password_hash_workers: int = 4
+    password_hash_queue: int = 64
+
+    # Posts per insert/upsert round-trip in bulk imports and cursor batch size
+    # for exports.
+    bulk_batch_size: int = 1000
+    # Documents per cursor batch, and items per flushed chunk, in streamed
+    # responses (?stream=ndjson|json).
+    stream_batch_size: int = 500
+
+    # Post-write side effects (stats counters, comment previews, cache
+    # invalidation) run on background workers through the outbox collection;
+    # 0 workers runs them inline. A claimed job is retried by any worker once
+    # its lease expires, with exponential backoff between failed attempts.
+    job_workers: int = 4
+    job_queue_size: int = 1000
+    job_max_attempts: int = 5
+    job_retry_base_seconds: float = 1.0
+    job_lease_seconds: float = 60.0
+    job_poll_seconds: float = 5.0
+
+    # New comments are written in insert_many batches of up to this many,
+    # flushed at the latest COMMENT_FLUSH_MS after the first one; 0 for either
+    # inserts every comment on its own.
+    comment_batch_size: int = 100
+    comment_flush_ms: float = 5.0
+
+    # Trending feed: publication and comments from the last
+    # TRENDING_WINDOW_HOURS, each losing half its weight every
+    # TRENDING_HALF_LIFE_HOURS. Posts with new comments are rescored every
+    # TRENDING_REFRESH_SECONDS; 0 stops rescoring.
+    trending_half_life_hours: float = 12.0
+    trending_window_hours: float = 168.0
+    trending_refresh_seconds: float = 60.0
+
+    # Following feed: posts of authors with up to this many followers are
+    # copied into each follower's timeline when published; posts of authors
+    # with more are read from the posts collection when a feed is loaded.
+    feed_fanout_max_followers: int = 1000
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,25 +1,97 @@
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 
+from app.cache import cache
 from app.config import settings
+from app.database.indexes import log_index_report, reconcile_indexes
+from app.database.monitoring import driver_metrics
+from app.database.profiler import query_profiler
 from app.models.category import Category
+from app.models.follow import Follow, FollowerCount, TimelineEntry
+from app.models.job import OutboxJob
+from app.models.lease import Lease
 from app.models.post import Comment, Post
+from app.models.stats import StatCounter
 from app.models.user import User
+from app.services.category_cache import category_cache
+from app.services.jobs import job_queue
+from app.services.post_service import comment_buffer
+from app.services.search_index import title_index
+from app.services.stats_service import StatsService
+from app.services.trending import trending_ranker
+
+DOCUMENT_MODELS = [
+    User,
+    Post,
+    Comment,
+    Category,
+    StatCounter,
+    OutboxJob,
+    Lease,
+    Follow,
+    FollowerCount,
+    TimelineEntry,
+]
 
 client = None
 
 
+def create_client() -> AsyncMongoClient:
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+    }
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    if settings.mongo_read_concern:
+        options["readConcernLevel"] = settings.mongo_read_concern
+    listeners = []
+    if settings.mongo_monitoring:
+        listeners.append(driver_metrics)
+    if settings.profiling_enabled:
+        listeners.append(query_profiler)
+    if listeners:
+        options["event_listeners"] = listeners
+    client = AsyncMongoClient(settings.mongodb_url, **options)
+    if settings.profiling_enabled:
+        query_profiler.client = client
+    return client
+
+
 async def init_db():
     global client
-    client = AsyncIOMotorClient(settings.mongodb_url)
+    client = create_client()
 
     await init_beanie(
         database=client[settings.database_name],
-        document_models=[User, Post, Comment, Category],
+        document_models=DOCUMENT_MODELS,
+        skip_indexes=not settings.create_indexes_on_startup,
     )
+    log_index_report(await reconcile_indexes(DOCUMENT_MODELS))
+
+    await category_cache.load()
+    if settings.category_change_stream:
+        category_cache.start_watching()
+    await StatsService.ensure_built()
+    if title_index.enabled:
+        await title_index.load()
+        title_index.start_refreshing(settings.title_index_refresh_seconds)
+    trending_ranker.start_refreshing(settings.trending_refresh_seconds)
+    job_queue.start()
 
 
 async def close_db():
     global client
+    # Before anything they depend on is torn down; buffered comments queue
+    # jobs, so they go first.
+    await comment_buffer.close()
+    await job_queue.stop()
+    await category_cache.stop_watching()
+    await title_index.stop_refreshing()
+    await trending_ranker.stop_refreshing()
+    await cache.close()
     if client:
-        client.close()
+        await client.close()
@@ -0,0 +1,102 @@
+import logging
+from typing import Dict, List, Tuple
+
+from beanie import Document
+from beanie.odm.utils.pydantic import get_model_fields
+from beanie.odm.utils.typing import get_index_attributes
+from pymongo import TEXT, IndexModel
+
+logger = logging.getLogger(__name__)
+
+IndexKey = Tuple[Tuple[str, object], ...]
+
+
+def _index_key(key: List[Tuple[str, object]], weights: Dict[str, int]) -> IndexKey:
+    # MongoDB reports text indexes as {_fts: "text", _ftsx: 1} with the indexed
+    # fields in "weights", so both sides are normalized to the weighted fields.
+    if any(direction == TEXT for _, direction in key) or "_fts" in dict(key):
+        scalar = [
+            (field, direction)
+            for field, direction in key
+            if direction != TEXT and field not in ("_fts", "_ftsx")
+        ]
+        text = [(field, TEXT) for field in sorted(weights)]
+        return tuple(scalar + text)
+    return tuple(
+        (field, direction if isinstance(direction, str) else int(direction))
+        for field, direction in key
+    )
+
+
+def declared_indexes(model: type[Document]) -> Dict[IndexKey, IndexModel]:
+    indexes: List[IndexModel] = []
+    for name, field in get_model_fields(model).items():
+        attributes = get_index_attributes(field)
+        if attributes is not None:
+            direction, options = attributes
+            indexes.append(IndexModel([(field.alias or name, direction)], **options))
+    indexes.extend(index.index for index in model.get_settings().indexes)
+
+    declared = {}
+    for index in indexes:
+        document = index.document
+        key = list(document["key"].items())
+        weights = document.get("weights") or {
+            field: 1 for field, direction in key if direction == TEXT
+        }
+        declared[_index_key(key, weights)] = index
+    return declared
+
+
+async def existing_indexes(model: type[Document]) -> Dict[IndexKey, str]:
+    information = await model.get_pymongo_collection().index_information()
+    return {
+        _index_key(details["key"], details.get("weights", {})): name
+        for name, details in information.items()
+        if name != "_id_"
+    }
+
+
+async def reconcile_indexes(
+    models: List[type[Document]], build: bool = False
+) -> Dict[str, Dict[str, List[str]]]:
+    """Compare declared and existing indexes per collection.
+
+    Missing indexes are created when ``build`` is set. Undeclared indexes are
+    only reported, never dropped.
+    """
+    report = {}
+    for model in models:
+        declared = declared_indexes(model)
+        existing = await existing_indexes(model)
+        missing = [index for key, index in declared.items() if key not in existing]
+        if build and missing:
+            await model.get_pymongo_collection().create_indexes(missing)
+
+        report[model.get_collection_name()] = {
+            "missing": [index.document["name"] for index in missing],
+            "built": [index.document["name"] for index in missing] if build else [],
+            "undeclared": [
+                name for key, name in existing.items() if key not in declared
+            ],
+        }
+    return report
+
+
+def log_index_report(report: Dict[str, Dict[str, List[str]]]):
+    for collection, entry in report.items():
+        pending = [name for name in entry["missing"] if name not in entry["built"]]
+        if pending:
+            logger.warning(
+                "Collection %s is missing indexes: %s", collection, ", ".join(pending)
+            )
+        if entry["built"]:
+            logger.info(
+                "Built indexes on %s: %s", collection, ", ".join(entry["built"])
+            )
+        if entry["undeclared"]:
+            logger.info(
+                "Collection %s has undeclared indexes: %s",
+                collection,
+                ", ".join(entry["undeclared"]),
+            )
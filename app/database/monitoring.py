@@ -0,0 +1,138 @@
+import math
+from collections import defaultdict, deque
+from typing import Deque, Dict
+
+from pymongo import monitoring
+
+from app.metrics import MONGO_CHECKOUT_WAIT, MONGO_COMMAND_LATENCY
+
+# Recent samples kept per series for percentiles.
+SAMPLE_SIZE = 1024
+
+
+class LatencySeries:
+    """Count, total and max since startup plus percentiles over recent samples."""
+
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+
+    def observe(self, seconds: float, failed: bool = False):
+        self.count += 1
+        self.failed += failed
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.recent)
+
+        def percentile(q: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+        return {
+            "count": self.count,
+            "failed": self.failed,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(percentile(0.50) * 1000, 3),
+            "p95_ms": round(percentile(0.95) * 1000, 3),
+            "p99_ms": round(percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class DriverMetrics(monitoring.CommandListener, monitoring.ConnectionPoolListener):
+    """Per-command latencies and connection pool checkout waits.
+
+    Registered on the client through ``event_listeners``; read the numbers with
+    ``snapshot()``. The same samples feed the Prometheus histograms, labelled
+    by collection, which is only known from the started event.
+    """
+
+    def __init__(self):
+        self.commands: Dict[str, LatencySeries] = defaultdict(LatencySeries)
+        self.checkout_wait = LatencySeries()
+        self.connections_open = 0
+        self.connections_checked_out = 0
+        self.pool_clears = 0
+        self._collections: Dict[int, str] = {}
+
+    # CommandListener
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            # getMore names its collection separately; admin commands have none.
+            target = event.command.get("collection", "")
+        self._collections[event.request_id] = target
+
+    def _observe(self, event, failed: bool):
+        seconds = event.duration_micros / 1e6
+        self.commands[event.command_name].observe(seconds, failed)
+        collection = self._collections.pop(event.request_id, "")
+        MONGO_COMMAND_LATENCY.labels(
+            collection, event.command_name, "failed" if failed else "ok"
+        ).observe(seconds)
+
+    def succeeded(self, event):
+        self._observe(event, failed=False)
+
+    def failed(self, event):
+        self._observe(event, failed=True)
+
+    # ConnectionPoolListener
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_out(self, event):
+        self.connections_checked_out += 1
+        self.checkout_wait.observe(event.duration or 0.0)
+        MONGO_CHECKOUT_WAIT.observe(event.duration or 0.0)
+
+    def connection_check_out_failed(self, event):
+        self.checkout_wait.observe(event.duration or 0.0, failed=True)
+
+    def connection_checked_in(self, event):
+        self.connections_checked_out -= 1
+
+    def connection_created(self, event):
+        self.connections_open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.connections_open -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        return {
+            "pool": {
+                "connections_open": self.connections_open,
+                "connections_checked_out": self.connections_checked_out,
+                "clears": self.pool_clears,
+                "checkout_wait": self.checkout_wait.snapshot(),
+            },
+            "commands": {
+                name: series.snapshot()
+                for name, series in sorted(self.commands.items())
+            },
+        }
+
+
+driver_metrics = DriverMetrics()
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from pymongo import monitoring
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Commands whose plans explain() can report on without side effects.
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+# Command fields that are per-call plumbing rather than part of the query.
+DRIVER_FIELDS = {"lsid", "txnNumber", "readConcern", "writeConcern", "cursor"}
+# Fields that make up a query's shape, per command.
+SHAPE_FIELDS = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+}
+# Re-explain a shape after this long, in case data or indexes changed.
+EXPLAIN_MAX_AGE = 600.0
+# Queries listed per slow request, and slow requests kept for /health/mongo/slow.
+MAX_REQUEST_QUERIES = 50
+RECENT_REQUESTS = 50
+
+
+def _shape(value: Any, keep: bool = False) -> Any:
+    """Replace literal values with "?" so queries differing only in their
+    arguments share a shape; sort directions are kept."""
+    if isinstance(value, dict):
+        return {
+            key: _shape(item, keep or key in ("$sort", "sort"))
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [_shape(item, keep) for item in value]
+        return "?"
+    return value if keep else "?"
+
+
+def query_shape(command_name: str, command: dict) -> str:
+    parts = {
+        name: _shape(command[name], keep=name == "sort")
+        for name in SHAPE_FIELDS.get(command_name, ())
+        if name in command
+    }
+    return json.dumps(parts, separators=(",", ":"), default=str)
+
+
+def _find_plan(explain: Any) -> Optional[dict]:
+    # Aggregations nest the query plan under stages[0].$cursor (or per shard).
+    if isinstance(explain, dict):
+        if "queryPlanner" in explain:
+            return explain
+        children = explain.values()
+    elif isinstance(explain, list):
+        children = explain
+    else:
+        return None
+    for child in children:
+        found = _find_plan(child)
+        if found:
+            return found
+    return None
+
+
+def summarize_plan(explain: dict) -> dict:
+    """Stages, indexes and document counts out of an executionStats explain."""
+    found = _find_plan(explain) or {}
+    winning = found.get("queryPlanner", {}).get("winningPlan", {})
+    winning = winning.get("queryPlan", winning)
+    stages: List[str] = []
+    indexes: List[str] = []
+    pending = [winning]
+    while pending:
+        stage = pending.pop()
+        if "stage" in stage:
+            stages.append(stage["stage"])
+        if "indexName" in stage:
+            indexes.append(stage["indexName"])
+        if "inputStage" in stage:
+            pending.append(stage["inputStage"])
+        pending.extend(stage.get("inputStages", []))
+    stats = found.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collscan": "COLLSCAN" in stages,
+        "returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+@dataclass
+class QueryShape:
+    database: str
+    collection: str
+    command: str
+    shape: str
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    plan: Optional[dict] = None
+    explained_at: Optional[float] = None
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "collection": self.collection,
+            "command": self.command,
+            "shape": json.loads(self.shape),
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total / self.count * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "plan": self.plan,
+        }
+
+
+@dataclass
+class RequestProfile:
+    method: str
+    route: str = ""
+    db_seconds: float = 0.0
+    commands: int = 0
+    queries: List[dict] = field(default_factory=list)
+    explains: List[asyncio.Task] = field(default_factory=list)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "request_profile", default=None
+)
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """Times every command against the request that issued it and keeps the
+    slowest query shapes, each with a summary of its explain() plan.
+
+    Registered on the client when PROFILING_ENABLED is set; ProfilingMiddleware
+    opens a profile per request and logs the slow ones.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.shapes: Dict[str, QueryShape] = {}
+        self.slow_requests: Deque[dict] = deque(maxlen=RECENT_REQUESTS)
+        self._started: Dict[int, tuple] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            target = event.command.get("collection", "")
+        self._started[event.request_id] = (target, event.command)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        started = self._started.pop(event.request_id, None)
+        if started is None:
+            return
+        collection, command = started
+        seconds = event.duration_micros / 1e6
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.db_seconds += seconds
+            profile.commands += 1
+        if seconds * 1000 < settings.slow_query_ms:
+            return
+
+        shape = query_shape(event.command_name, command)
+        key = f"{event.database_name}.{collection}.{event.command_name} {shape}"
+        entry = self.shapes.get(key)
+        if entry is None:
+            entry = QueryShape(
+                event.database_name, collection, event.command_name, shape
+            )
+            self._remember(key, entry)
+        entry.observe(seconds)
+
+        if profile is not None and len(profile.queries) < MAX_REQUEST_QUERIES:
+            profile.queries.append({"key": key, "ms": round(seconds * 1000, 3)})
+        now = time.monotonic()
+        if event.command_name in EXPLAINABLE and (
+            entry.explained_at is None or now - entry.explained_at > EXPLAIN_MAX_AGE
+        ):
+            entry.explained_at = now
+            task = self._spawn(self._explain(entry, command))
+            if task is not None and profile is not None:
+                profile.explains.append(task)
+
+    def _remember(self, key: str, entry: QueryShape):
+        if len(self.shapes) >= settings.profiling_max_shapes:
+            cheapest = min(self.shapes, key=lambda k: self.shapes[k].total)
+            del self.shapes[cheapest]
+        self.shapes[key] = entry
+
+    def _spawn(self, coro) -> Optional[asyncio.Task]:
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return None
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _explain(self, entry: QueryShape, command: dict):
+        if self.client is None:
+            return
+        pipeline = command.get("pipeline") or []
+        if any("$out" in stage or "$merge" in stage for stage in pipeline):
+            return
+        query = {
+            name: value
+            for name, value in command.items()
+            if not name.startswith("$") and name not in DRIVER_FIELDS
+        }
+        if entry.command == "aggregate":
+            query["cursor"] = {}
+        try:
+            explain = await self.client[entry.database].command(
+                {"explain": query, "verbosity": "executionStats"}
+            )
+        except Exception as exc:
+            logger.warning("explain failed for %s: %s", entry.shape, exc)
+            return
+        entry.plan = summarize_plan(explain)
+
+    async def _report(self, profile: RequestProfile, status: int, seconds: float):
+        if profile.explains:
+            await asyncio.gather(*profile.explains, return_exceptions=True)
+        queries = []
+        for query in profile.queries:
+            entry = self.shapes.get(query["key"])
+            if entry is not None:
+                queries.append(
+                    {
+                        "collection": entry.collection,
+                        "command": entry.command,
+                        "ms": query["ms"],
+                        "shape": json.loads(entry.shape),
+                        "plan": entry.plan,
+                    }
+                )
+        report = {
+            "method": profile.method,
+            "route": profile.route,
+            "status": status,
+            "total_ms": round(seconds * 1000, 3),
+            "db_ms": round(profile.db_seconds * 1000, 3),
+            "python_ms": round(max(seconds - profile.db_seconds, 0.0) * 1000, 3),
+            "commands": profile.commands,
+            "slow_queries": queries,
+        }
+        self.slow_requests.append(report)
+        logger.warning("Slow request: %s", json.dumps(report, default=str))
+
+    def report_slow_request(self, profile: RequestProfile, status: int, seconds: float):
+        self._spawn(self._report(profile, status, seconds))
+
+    def snapshot(self, limit: int = 10, order: str = "total") -> dict:
+        ordered = sorted(
+            self.shapes.values(), key=lambda entry: getattr(entry, order), reverse=True
+        )
+        return {
+            "slow_query_ms": settings.slow_query_ms,
+            "slow_request_ms": settings.slow_request_ms,
+            "queries": [entry.snapshot() for entry in ordered[:limit]],
+            "requests": list(self.slow_requests)[-limit:],
+        }
+
+
+query_profiler = QueryProfiler()
+
+
+class ProfilingMiddleware:
+    """Opens a profile for every HTTP request and reports the ones slower than
+    SLOW_REQUEST_MS, split into time spent waiting on MongoDB and the rest."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"])
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_profile.reset(token)
+            if elapsed * 1000 >= settings.slow_request_ms:
+                profile.route = route_template(scope)
+                query_profiler.report_slow_request(profile, status, elapsed)
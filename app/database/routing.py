@@ -0,0 +1,16 @@
+from beanie import Document
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+
+from app.config import settings
+
+
+def read_preference(name: str):
+    return make_read_preference(read_pref_mode_from_name(name), None)
+
+
+def listing_collection(model: type[Document]):
+    """Collection for reads that tolerate replication lag: listings, search and
+    stats. Routed by LISTING_READ_PREFERENCE (e.g. secondaryPreferred)."""
+    return model.get_pymongo_collection().with_options(
+        read_preference=read_preference(settings.listing_read_preference)
+    )
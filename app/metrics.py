@@ -0,0 +1,143 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory shared by them (wiped before start); every worker then writes its
+# samples there and /metrics aggregates all of them.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)  # fmt: skip
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size by route template",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+MONGO_COMMAND_LATENCY = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection and command",
+    ["collection", "command", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+MONGO_CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["cache", "result"],
+)
+CACHE_ERRORS = Counter(
+    "cache_errors_total",
+    "Shared cache calls that failed, by operation",
+    ["operation"],
+)
+BACKGROUND_JOBS = Counter(
+    "background_jobs_total",
+    "Background job runs by kind and outcome (done, retried or failed)",
+    ["kind", "outcome"],
+)
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1):
+    if count:
+        CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+def record_cache_error(operation: str):
+    CACHE_ERRORS.labels(operation).inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    # Drops this worker's live gauges (in-flight requests) from the totals.
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def route_template(scope: Scope) -> str:
+    # scope["route"] is the APIRoute as declared on its router, without the
+    # include_router prefix; FastAPI keeps the prefixed one alongside it.
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    template = getattr(context, "path_format", None)
+    if not template:
+        template = getattr(scope.get("route"), "path", None)
+    return template or "unmatched"
+
+
+class MetricsMiddleware:
+    """Records latency, in-flight count and body size for every HTTP request.
+
+    Routes are labelled by template (/api/posts/{post_id}) rather than by
+    path, which keeps label cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            template = route_template(scope)
+            REQUEST_LATENCY.labels(method, template, str(status)).observe(elapsed)
+            RESPONSE_SIZE.labels(method, template).observe(size)
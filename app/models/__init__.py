@@ -1,5 +1,20 @@
 from app.models.category import Category
+from app.models.follow import Follow, FollowerCount, TimelineEntry
+from app.models.job import OutboxJob
+from app.models.lease import Lease
 from app.models.post import Comment, Post
+from app.models.stats import StatCounter
 from app.models.user import User
 
-__all__ = ["User", "Post", "Comment", "Category"]
+__all__ = [
+    "User",
+    "Post",
+    "Comment",
+    "Category",
+    "StatCounter",
+    "OutboxJob",
+    "Lease",
+    "Follow",
+    "FollowerCount",
+    "TimelineEntry",
+]
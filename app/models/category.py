@@ -2,7 +2,7 @@ from beanie import Document, Indexed
 
 
 class Category(Document):
-    name: str = Indexed(unique=True)
+    name: Indexed(str, unique=True)
     description: str
 
     class Settings:
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+class Follow(Document):
+    follower_id: str
+    author_id: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "follows"
+        indexes = [
+            IndexModel(
+                [("follower_id", ASCENDING), ("author_id", ASCENDING)],
+                name="follower_author",
+                unique=True,
+            ),
+            # Fan-out walks an author's followers.
+            IndexModel(
+                [("author_id", ASCENDING), ("follower_id", ASCENDING)],
+                name="author_follower",
+            ),
+        ]
+
+
+class FollowerCount(Document):
+    """How many users follow an author; the id is the author's id. Decides
+    whether the author's posts are copied into timelines or read on demand."""
+
+    id: str
+    followers: int = 0
+
+    class Settings:
+        name = "follower_counts"
+
+
+class TimelineEntry(Document):
+    """A published post copied into the feed of one of its author's followers."""
+
+    owner_id: str
+    post_id: str
+    author_id: str
+    created_at: datetime
+
+    class Settings:
+        name = "timelines"
+        indexes = [
+            # A feed page is one range scan, newest first; unique so a retried
+            # fan-out does not add a post twice.
+            IndexModel(
+                [
+                    ("owner_id", ASCENDING),
+                    ("created_at", DESCENDING),
+                    ("post_id", DESCENDING),
+                ],
+                name="owner_created_at",
+                unique=True,
+            ),
+            IndexModel(
+                [("owner_id", ASCENDING), ("author_id", ASCENDING)],
+                name="owner_author",
+            ),
+            IndexModel([("post_id", ASCENDING)], name="post"),
+        ]
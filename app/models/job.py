@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class OutboxJob(Document):
+    """A post-write side effect waiting to run, or parked after failing."""
+
+    kind: str
+    payload: dict = Field(default_factory=dict)
+    status: Literal["pending", "running", "failed"] = "pending"
+    # Incremented on every claim, so a job that keeps killing its worker is
+    # still given up on.
+    attempts: int = 0
+    run_after: datetime = Field(default_factory=datetime.utcnow)
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "outbox"
+        indexes = [
+            IndexModel(
+                [("status", ASCENDING), ("run_after", ASCENDING)],
+                name="status_run_after",
+            ),
+            IndexModel(
+                [("status", ASCENDING), ("locked_until", ASCENDING)],
+                name="status_locked_until",
+            ),
+        ]
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from beanie import Document
+
+
+class Lease(Document):
+    """Held by one process at a time, until it is released or expires. The id
+    names what it guards, e.g. "stats.rebuild"."""
+
+    id: str
+    owner: str
+    expires_at: datetime
+
+    class Settings:
+        name = "leases"
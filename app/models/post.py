@@ -2,10 +2,15 @@ from datetime import datetime
 from typing import List, Optional
 
 from beanie import Document, Indexed, Link
-from pydantic import Field
+from bson import ObjectId
+from pydantic import BaseModel, Field
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
 
 from .category import Category
 
+# How many of the newest comments are embedded in each post document.
+LATEST_COMMENTS_LIMIT = 3
+
 
 class Comment(Document):
     post_id: str
@@ -15,18 +20,103 @@ class Comment(Document):
 
     class Settings:
         name = "comments"
+        indexes = [
+            IndexModel(
+                [("post_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+                name="post_created_at",
+            ),
+            # Finds the posts commented on since the last trending refresh
+            # without reading the comments themselves.
+            IndexModel(
+                [("created_at", ASCENDING), ("post_id", ASCENDING)],
+                name="created_at_post",
+            ),
+        ]
+
+
+class CommentPreview(BaseModel):
+    id: str
+    author: str
+    content: str
+    created_at: datetime
 
 
 class Post(Document):
-    title: str = Indexed()
+    title: Indexed(str)
     content: str
     author_id: str
     author_name: str
     category: Optional[Link[Category]] = None
     tags: List[str] = Field(default_factory=list)
     published: bool = False
+    comment_count: int = 0
+    latest_comments: List[CommentPreview] = Field(default_factory=list)
+    # Maintained by app.services.trending; ranks the trending feed.
+    trending_score: Optional[float] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+    def get_category_id(self) -> Optional[ObjectId]:
+        """Id of the linked category, without fetching it."""
+        if isinstance(self.category, Link):
+            return self.category.ref.id
+        if isinstance(self.category, Category):
+            return self.category.id
+        return None
+
     class Settings:
         name = "posts"
+        # Every listing filters on published (or author) and keyset pagination
+        # walks (created_at, _id) newest first within that filter.
+        indexes = [
+            IndexModel(
+                [
+                    ("published", ASCENDING),
+                    ("created_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="published_created_at",
+            ),
+            IndexModel(
+                [
+                    ("published", ASCENDING),
+                    ("tags", ASCENDING),
+                    ("created_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="published_tags_created_at",
+            ),
+            IndexModel(
+                [
+                    ("published", ASCENDING),
+                    ("category.$id", ASCENDING),
+                    ("created_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="published_category_created_at",
+            ),
+            IndexModel(
+                [
+                    ("author_id", ASCENDING),
+                    ("created_at", DESCENDING),
+                    ("_id", DESCENDING),
+                ],
+                name="author_created_at",
+            ),
+            # Natural key for bulk imports that carry no post id.
+            IndexModel(
+                [("author_id", ASCENDING), ("title", ASCENDING)], name="author_title"
+            ),
+            IndexModel([("comment_count", DESCENDING)], name="comment_count"),
+            IndexModel(
+                [("published", ASCENDING), ("trending_score", DESCENDING)],
+                name="published_trending",
+            ),
+            # Stemming is disabled ("none") because posts are multilingual.
+            IndexModel(
+                [("title", TEXT), ("content", TEXT)],
+                weights={"title": 10, "content": 1},
+                default_language="none",
+                name="post_text",
+            ),
+        ]
@@ -0,0 +1,18 @@
+from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+class StatCounter(Document):
+    """A precomputed counter; the id is "<kind>:<key>", e.g. "tag:python"."""
+
+    id: str
+    kind: str
+    key: str
+    value: int = 0
+    generation: str = ""
+
+    class Settings:
+        name = "stats"
+        indexes = [
+            IndexModel([("kind", ASCENDING), ("value", DESCENDING)], name="kind_value"),
+        ]
@@ -2,6 +2,7 @@
 from beanie import Document
 from fastapi_users.db import BeanieBaseUser
 from pydantic import EmailStr
+from pymongo import IndexModel
 
 
 class User(BeanieBaseUser, Document):
@@ -15,3 +16,12 @@ class User(BeanieBaseUser, Document):
     class Settings:
         name = "users"
         email_collation = {"locale": "en", "strength": 2}
+        # Login looks users up by email with this collation.
+        indexes = [
+            IndexModel(
+                "email",
+                name="case_insensitive_email_index",
+                collation=email_collation,
+                unique=True,
+            ),
+        ]
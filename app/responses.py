@@ -0,0 +1,35 @@
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+
+def render_json(content: Any, exclude_unset: bool = False) -> bytes:
+    """Serialize straight to JSON bytes with pydantic-core.
+
+    Skips the jsonable_encoder pass (a Python walk over every value) and the
+    stdlib json.dumps that JSONResponse would run after it.
+    """
+    if isinstance(content, BaseModel):
+        # serialize_as_any keeps subclass fields (e.g. search scores) that a
+        # generic container's declared item type does not know about.
+        return content.model_dump_json(
+            exclude_unset=exclude_unset, serialize_as_any=True
+        ).encode()
+    return to_json(content, serialize_unknown=True)
+
+
+class FastJSONResponse(Response):
+    """JSON response for handlers that return models FastAPI would otherwise
+    re-validate; the content is trusted to match the declared response_model.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Any, exclude_unset: bool = False, **kwargs):
+        self.exclude_unset = exclude_unset
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content, self.exclude_unset)
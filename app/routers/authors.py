@@ -0,0 +1,61 @@
+from typing import Optional, Set
+
+from beanie import PydanticObjectId
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.auth.user_manager import current_active_user
+from app.cache import cached_json_response
+from app.models.user import User
+from app.routers.posts import CURSOR_QUERY, _paged, summary_fields
+from app.schemas.post import PostPage
+from app.services.feed_service import FeedService
+from app.services.post_service import PostService
+
+router = APIRouter()
+
+
+@router.get("/authors/{author_id}/posts", response_model=PostPage)
+async def get_posts_by_author(
+    request: Request,
+    author_id: str,
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = CURSOR_QUERY,
+    with_total: bool = False,
+    fields: Optional[Set[str]] = Depends(summary_fields),
+):
+    return await cached_json_response(
+        request,
+        ["posts"],
+        lambda: _paged(
+            PostService.get_posts_by_author,
+            author_id,
+            page,
+            size,
+            cursor,
+            with_total,
+            fields,
+        ),
+        exclude_unset=True,
+    )
+
+
+@router.post("/authors/{author_id}/follow", status_code=204)
+async def follow_author(author_id: str, user: User = Depends(current_active_user)):
+    if author_id == str(user.id):
+        raise HTTPException(status_code=400, detail="Users cannot follow themselves")
+    if not ObjectId.is_valid(author_id) or not await User.get(
+        PydanticObjectId(author_id)
+    ):
+        raise HTTPException(status_code=404, detail="Author not found")
+
+    await FeedService.follow(str(user.id), author_id)
+    return None
+
+
+@router.delete("/authors/{author_id}/follow", status_code=204)
+async def unfollow_author(author_id: str, user: User = Depends(current_active_user)):
+    if not await FeedService.unfollow(str(user.id), author_id):
+        raise HTTPException(status_code=404, detail="Not following this author")
+    return None
@@ -1,33 +1,46 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 
 from app.auth.user_manager import current_active_user
+from app.cache import cache, cached_json_response
 from app.models.category import Category
 from app.models.user import User
 from app.schemas.post import CategoryCreate, CategoryResponse
+from app.services.category_cache import category_cache
 
 router = APIRouter()
 
 
 @router.get("/categories", response_model=List[CategoryResponse])
-async def list_categories():
-    categories = await Category.find_all().to_list()
-    return [
-        CategoryResponse(id=str(c.id), name=c.name, description=c.description)
-        for c in categories
-    ]
+async def list_categories(request: Request):
+    async def load():
+        # Served from memory: this worker's writes are put into the category
+        # cache and other workers' arrive through its change stream (with
+        # CATEGORY_CHANGE_STREAM), so there is nothing to re-read.
+        return [
+            CategoryResponse(id=str(c.id), name=c.name, description=c.description)
+            for c in category_cache.all()
+        ]
+
+    return await cached_json_response(request, ["categories"], load)
 
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
-async def get_category(category_id: str):
-    category = await Category.get(category_id)
-    if not category:
+async def get_category(category_id: str, request: Request):
+    async def load():
+        category = await category_cache.get(category_id)
+        if not category:
+            return None
+        return CategoryResponse(
+            id=str(category.id), name=category.name, description=category.description
+        )
+
+    response = await cached_json_response(request, ["categories"], load)
+    if response is None:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    return CategoryResponse(
-        id=str(category.id), name=category.name, description=category.description
-    )
+    return response
 
 
 @router.post("/categories", response_model=CategoryResponse, status_code=201)
@@ -41,6 +54,8 @@ async def create_category(
 
     new_category = Category(name=category.name, description=category.description)
     await new_category.insert()
+    category_cache.put(new_category)
+    await cache.invalidate("categories")
 
     return CategoryResponse(
         id=str(new_category.id),
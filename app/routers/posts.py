@@ -1,61 +1,261 @@
-from typing import List
+from typing import Literal, Optional, Set, Type
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
-from app.auth.user_manager import current_active_user
-from app.models.post import Comment
+from app.auth.user_manager import current_active_user, current_superuser
+from app.cache import cached_json_response
+from app.config import settings
 from app.models.user import User
-from app.schemas.pagination import PaginatedResponse
+from app.responses import FastJSONResponse
+from app.schemas.bulk import ImportReport
+from app.schemas.pagination import CursorPaginatedResponse
 from app.schemas.post import (
     CommentCreate,
     CommentResponse,
     PostCreate,
+    PostPage,
     PostResponse,
+    PostSearchPage,
+    PostSearchSummary,
+    PostSummary,
     PostUpdate,
 )
+from app.services.bulk_service import BulkService
+from app.services.cursor import InvalidCursorError
 from app.services.post_service import PostService
+from app.services.search_index import title_index
+from app.services.streaming import StreamFormat, ndjson_lines, stream_response
 
 router = APIRouter()
 
 
-@router.get("/posts", response_model=PaginatedResponse[PostResponse])
-async def list_posts(page: int = Query(1, ge=1), size: int = Query(10, ge=1, le=100)):
-    return await PostService.get_posts(page, size)
+STREAM_QUERY = Query(
+    None,
+    description=(
+        "Stream every remaining item as NDJSON or as one JSON array instead of "
+        "returning a single page"
+    ),
+)
 
+CURSOR_QUERY = Query(
+    None,
+    description=(
+        "Opaque keyset cursor. Pass an empty value to start cursor pagination "
+        "and the returned next_cursor to continue; page is ignored."
+    ),
+)
 
-@router.get("/posts/search/", response_model=PaginatedResponse[PostResponse])
-async def search_posts(
-    q: str = Query(..., min_length=1),
+
+def _sparse_fields(model: Type[BaseModel]):
+    def parse(
+        fields: Optional[str] = Query(
+            None,
+            description=(
+                f"Comma-separated {model.__name__} fields to return "
+                "(sparse fieldset); id is always included"
+            ),
+        ),
+    ) -> Optional[Set[str]]:
+        if not fields:
+            return None
+        selected = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = selected - set(model.model_fields)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            )
+        return selected
+
+    return parse
+
+
+summary_fields = _sparse_fields(PostSummary)
+post_fields = _sparse_fields(PostResponse)
+
+
+async def _paged(fetch, *args, **kwargs):
+    try:
+        return await fetch(*args, **kwargs)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.get("/posts", response_model=PostPage)
+async def list_posts(
+    request: Request,
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = CURSOR_QUERY,
+    with_total: bool = False,
+    fields: Optional[Set[str]] = Depends(summary_fields),
 ):
-    return await PostService.search_posts(q, page, size)
+    return await cached_json_response(
+        request,
+        ["posts"],
+        lambda: _paged(PostService.get_posts, page, size, cursor, with_total, fields),
+        exclude_unset=True,
+    )
 
 
 @router.get(
-    "/posts/category/{category_id}", response_model=PaginatedResponse[PostResponse]
+    "/posts/trending", response_model=CursorPaginatedResponse[PostSearchSummary]
 )
+async def trending_posts(
+    request: Request,
+    size: int = Query(10, ge=1, le=100),
+    fields: Optional[Set[str]] = Depends(summary_fields),
+):
+    # Scores change only when the ranker refreshes them, which bumps
+    # "trending"; "posts" drops deleted and unpublished posts right away.
+    return await cached_json_response(
+        request,
+        ["posts", "trending"],
+        lambda: PostService.get_trending(size, fields),
+        exclude_unset=True,
+    )
+
+
+@router.get("/posts/search/", response_model=PostSearchPage)
+async def search_posts(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = CURSOR_QUERY,
+    with_total: bool = False,
+    mode: Literal["text", "regex", "prefix"] = Query(
+        "regex",
+        description=(
+            "regex: substring match; text: relevance-ranked full-text search; "
+            "prefix: typeahead on title words"
+        ),
+    ),
+    fields: Optional[Set[str]] = Depends(summary_fields),
+):
+    if cursor is not None and mode != "regex":
+        raise HTTPException(
+            status_code=400, detail="Cursor pagination requires mode=regex"
+        )
+    if mode == "prefix" and not title_index.enabled:
+        raise HTTPException(status_code=400, detail="Prefix search is disabled")
+
+    result = await _paged(
+        PostService.search_posts, q, page, size, cursor, with_total, mode, fields
+    )
+    # Returned directly: re-validating against the Union response model would
+    # fill in the fields a sparse fieldset left out, and costs a second pass.
+    return FastJSONResponse(result, exclude_unset=True)
+
+
+@router.get("/posts/category/{category_id}", response_model=PostPage)
 async def get_posts_by_category(
-    category_id: str, page: int = Query(1, ge=1), size: int = Query(10, ge=1, le=100)
+    request: Request,
+    category_id: str,
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = CURSOR_QUERY,
+    with_total: bool = False,
+    fields: Optional[Set[str]] = Depends(summary_fields),
 ):
-    result = await PostService.get_posts_by_category(category_id, page, size)
+    result = await cached_json_response(
+        request,
+        ["posts"],
+        lambda: _paged(
+            PostService.get_posts_by_category,
+            category_id,
+            page,
+            size,
+            cursor,
+            with_total,
+            fields,
+        ),
+        exclude_unset=True,
+    )
     return result
 
 
-@router.get("/posts/tag/{tag}", response_model=PaginatedResponse[PostResponse])
+@router.get("/posts/tag/{tag}", response_model=PostPage)
 async def get_posts_by_tag(
-    tag: str, page: int = Query(1, ge=1), size: int = Query(10, ge=1, le=100)
+    request: Request,
+    tag: str,
+    page: int = Query(1, ge=1),
+    size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = CURSOR_QUERY,
+    with_total: bool = False,
+    fields: Optional[Set[str]] = Depends(summary_fields),
+):
+    return await cached_json_response(
+        request,
+        ["posts"],
+        lambda: _paged(
+            PostService.get_posts_by_tag, tag, page, size, cursor, with_total, fields
+        ),
+        exclude_unset=True,
+    )
+
+
+@router.get("/feed", response_model=CursorPaginatedResponse[PostSummary])
+async def get_feed(
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from next_cursor of the previous page"
+    ),
+    size: int = Query(20, ge=1, le=100),
+    fields: Optional[Set[str]] = Depends(summary_fields),
+    user: User = Depends(current_active_user),
 ):
-    return await PostService.get_posts_by_tag(tag, page, size)
+    """Posts of the authors the current user follows, newest first."""
+    result = await _paged(PostService.get_feed, str(user.id), cursor, size, fields)
+    return FastJSONResponse(result, exclude_unset=True)
+
+
+@router.post("/posts/bulk", response_model=ImportReport)
+async def bulk_import_posts(
+    request: Request,
+    batch_size: int = Query(settings.bulk_batch_size, ge=1, le=10000),
+    rebuild_stats: bool = False,
+    user: User = Depends(current_superuser),
+):
+    """Upsert posts from an NDJSON body (one PostRecord per line).
+
+    Records without author_id are attributed to the calling user. Stats are
+    updated for what was inserted; ``rebuild_stats`` recomputes them all.
+    """
+    return await BulkService.import_posts(
+        ndjson_lines(request.stream()),
+        batch_size=batch_size,
+        default_author=(str(user.id), user.username),
+        rebuild_stats=rebuild_stats,
+    )
+
+
+@router.get("/posts/export", response_class=StreamingResponse)
+async def export_posts(
+    published: Optional[bool] = None,
+    format: StreamFormat = "ndjson",
+    user: User = Depends(current_superuser),
+):
+    return stream_response(BulkService.export_posts(published), format)
 
 
 @router.get("/posts/{post_id}", response_model=PostResponse)
-async def get_post(post_id: str):
-    post = await PostService.get_post(post_id)
-    if not post:
+async def get_post(
+    post_id: str,
+    request: Request,
+    fields: Optional[Set[str]] = Depends(post_fields),
+):
+    async def load():
+        post = await PostService.get_post(post_id)
+        if post is None or fields is None:
+            return post
+        return post.model_dump(include=fields | {"id"})
+
+    response = await cached_json_response(request, [f"post:{post_id}"], load)
+    if response is None:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    return post
+    return response
 
 
 @router.post("/posts", response_model=PostResponse, status_code=201)
@@ -92,33 +292,33 @@ async def delete_post(post_id: str, user: User = Depends(current_active_user)):
     return None
 
 
-@router.get("/posts/{post_id}/comments", response_model=List[CommentResponse])
-async def get_post_comments(post_id: str):
-    comments = await Comment.find(Comment.post_id == post_id).to_list()
-    return [
-        CommentResponse(
-            id=str(c.id), author=c.author, content=c.content, created_at=c.created_at
-        )
-        for c in comments
-    ]
+@router.get(
+    "/posts/{post_id}/comments",
+    response_model=CursorPaginatedResponse[CommentResponse],
+)
+async def get_post_comments(
+    post_id: str,
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from next_cursor of the previous page"
+    ),
+    size: int = Query(20, ge=1, le=100),
+    stream: Optional[StreamFormat] = STREAM_QUERY,
+):
+    if stream is not None:
+        try:
+            comments = PostService.iter_comments(post_id, cursor)
+        except InvalidCursorError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        return stream_response(comments, stream)
+
+    return await _paged(PostService.get_comments, post_id, cursor, size)
 
 
 @router.post(
     "/posts/{post_id}/comments", response_model=CommentResponse, status_code=201
 )
 async def create_comment(post_id: str, comment: CommentCreate):
-    post = await PostService.get_post(post_id)
-    if not post:
+    if not await PostService.post_exists(post_id):
         raise HTTPException(status_code=404, detail="Post not found")
 
-    new_comment = Comment(
-        post_id=post_id, author=comment.author, content=comment.content
-    )
-    await new_comment.insert()
-
-    return CommentResponse(
-        id=str(new_comment.id),
-        author=new_comment.author,
-        content=new_comment.content,
-        created_at=new_comment.created_at,
-    )
+    return await PostService.create_comment(post_id, comment)
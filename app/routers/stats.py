@@ -1,65 +1,108 @@
-from collections import Counter
+import asyncio
+from typing import Literal, Optional
 
-from fastapi import APIRouter
+from beanie import PydanticObjectId
+from bson import ObjectId
+from fastapi import APIRouter, Request
+from pydantic import BaseModel, Field
 
-from app.models.post import Comment, Post
+from app.cache import cached_json_response
+from app.database.routing import listing_collection
+from app.models.post import Post
+from app.services.category_cache import category_cache
+from app.services.stats_service import StatsService
+from app.services.streaming import StreamFormat, stream_response
 
 router = APIRouter()
 
 
+class PostCommentCount(BaseModel):
+    id: PydanticObjectId = Field(alias="_id")
+    comment_count: int
+
+
+class CounterRecord(BaseModel):
+    kind: str
+    key: str
+    value: int
+
+
 @router.get("/stats/top-authors")
-async def get_top_authors(limit: int = 10):
-    posts = await Post.find_all().to_list()
-    author_counts = Counter(post.author_name for post in posts)
+async def get_top_authors(request: Request, limit: int = 10):
+    async def load():
+        counters = await StatsService.top("author", limit)
+        return [
+            {"author": counter.key, "post_count": counter.value} for counter in counters
+        ]
 
-    return [
-        {"author": author, "post_count": count}
-        for author, count in author_counts.most_common(limit)
-    ]
+    return await cached_json_response(request, ["stats"], load)
 
 
 @router.get("/stats/popular-categories")
-async def get_popular_categories():
-    posts = await Post.find_all().to_list()
-    category_counts = {}
-
-    for post in posts:
-        if post.category:
-            category = await post.category.fetch()
-            category_counts[category.name] = category_counts.get(category.name, 0) + 1
-
-    return [
-        {"category": name, "post_count": count}
-        for name, count in sorted(
-            category_counts.items(), key=lambda x: x[1], reverse=True
-        )
-    ]
+async def get_popular_categories(request: Request):
+    async def load():
+        counters = await StatsService.top("category")
+        categories = await category_cache.get_many(counter.key for counter in counters)
+        return [
+            {
+                "category": categories[ObjectId(counter.key)].name,
+                "post_count": counter.value,
+            }
+            for counter in counters
+            if ObjectId(counter.key) in categories
+        ]
+
+    return await cached_json_response(request, ["stats", "categories"], load)
 
 
 @router.get("/stats/comments-stats")
-async def get_comments_stats():
-    posts = await Post.find_all().to_list()
-    comments = await Comment.find_all().to_list()
+async def get_comments_stats(request: Request):
+    async def load():
+        total_posts, total_comments, most_commented = await asyncio.gather(
+            StatsService.total("posts"),
+            StatsService.total("comments"),
+            listing_collection(Post)
+            .find({"comment_count": {"$gt": 0}}, {"comment_count": 1})
+            .sort("comment_count", -1)
+            .limit(10)
+            .to_list(),
+        )
+        most_commented = [
+            PostCommentCount.model_validate(document) for document in most_commented
+        ]
+        return {
+            "total_comments": total_comments,
+            "total_posts": total_posts,
+            "average_comments_per_post": (
+                total_comments / total_posts if total_posts else 0
+            ),
+            "posts_with_most_comments": [
+                {"post_id": str(post.id), "comment_count": post.comment_count}
+                for post in most_commented
+            ],
+        }
+
+    return await cached_json_response(request, ["stats"], load)
+
 
-    post_comment_counts = Counter(c.post_id for c in comments)
+@router.get("/stats/tags-distribution")
+async def get_tags_distribution(request: Request):
+    async def load():
+        counters = await StatsService.top("tag", 20)
+        return [{"tag": counter.key, "count": counter.value} for counter in counters]
 
-    return {
-        "total_comments": len(comments),
-        "total_posts": len(posts),
-        "average_comments_per_post": len(comments) / len(posts) if posts else 0,
-        "posts_with_most_comments": [
-            {"post_id": post_id, "comment_count": count}
-            for post_id, count in post_comment_counts.most_common(10)
-        ],
-    }
+    return await cached_json_response(request, ["stats"], load)
 
 
-@router.get("/stats/tags-distribution")
-async def get_tags_distribution():
-    posts = await Post.find_all().to_list()
-    tag_counts = Counter()
+@router.get("/stats/raw")
+async def get_raw_counters(
+    kind: Optional[Literal["total", "author", "category", "tag"]] = None,
+    format: StreamFormat = "ndjson",
+):
+    """Stream the raw counters behind the other stats endpoints."""
 
-    for post in posts:
-        tag_counts.update(post.tags)
+    async def records():
+        async for document in StatsService.iter_counters(kind):
+            yield CounterRecord.model_validate(document)
 
-    return [{"tag": tag, "count": count} for tag, count in tag_counts.most_common(20)]
+    return stream_response(records(), format)
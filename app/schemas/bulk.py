@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from typing import Annotated, List, Optional
+
+from pydantic import AfterValidator, BaseModel, Field
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# Stored dates are naive UTC, as datetime.utcnow() makes them; offsets in the
+# input are converted so that imported and generated dates compare.
+UtcDatetime = Annotated[datetime, AfterValidator(_naive_utc)]
+
+
+class CommentRecord(BaseModel):
+    id: Optional[str] = None
+    author: str
+    content: str
+    created_at: Optional[UtcDatetime] = None
+
+
+class PostRecord(BaseModel):
+    """One NDJSON line of a bulk import or export.
+
+    Posts are matched on ``id`` when given, otherwise on (author_id, title).
+    Comments are matched on ``id``, otherwise on their post, author, content
+    and created_at.
+    """
+
+    id: Optional[str] = None
+    title: str
+    content: str
+    author_id: Optional[str] = None
+    author_name: Optional[str] = None
+    category: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+    published: bool = False
+    created_at: Optional[UtcDatetime] = None
+    updated_at: Optional[UtcDatetime] = None
+    comments: List[CommentRecord] = Field(default_factory=list)
+
+
+class ImportFailure(BaseModel):
+    line: int
+    error: str
+
+
+class ImportCounts(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+
+
+class ImportReport(BaseModel):
+    posts: ImportCounts = Field(default_factory=ImportCounts)
+    comments: ImportCounts = Field(default_factory=ImportCounts)
+    errors: List[ImportFailure] = Field(default_factory=list)
+    error_count: int = 0
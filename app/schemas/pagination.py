@@ -1,4 +1,4 @@
-from typing import Generic, List, TypeVar
+from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
@@ -11,3 +11,10 @@ class PaginatedResponse(BaseModel, Generic[T]):
     page: int
     size: int
     pages: int
+
+
+class CursorPaginatedResponse(BaseModel, Generic[T]):
+    items: List[T]
+    size: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
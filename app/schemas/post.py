@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
 
 from pydantic import BaseModel, Field
 
+from app.schemas.pagination import CursorPaginatedResponse, PaginatedResponse
+
 
 class PostCreate(BaseModel):
     title: str
@@ -20,6 +22,13 @@ class PostUpdate(BaseModel):
     published: Optional[bool] = None
 
 
+class CommentResponse(BaseModel):
+    id: str
+    author: str
+    content: str
+    created_at: datetime
+
+
 class PostResponse(BaseModel):
     id: str
     title: str
@@ -29,10 +38,43 @@ class PostResponse(BaseModel):
     category_name: Optional[str] = None
     tags: List[str]
     published: bool
+    comment_count: int = 0
+    latest_comments: List[CommentResponse] = Field(default_factory=list)
     created_at: datetime
     updated_at: datetime
 
 
+class PostSummary(BaseModel):
+    """Listing view of a post: an excerpt instead of the full content.
+
+    Everything but id is optional because ``fields=`` can select a subset;
+    unselected fields are left out of the response.
+    """
+
+    id: str
+    title: Optional[str] = None
+    excerpt: Optional[str] = None
+    author_id: Optional[str] = None
+    author_name: Optional[str] = None
+    category_name: Optional[str] = None
+    tags: Optional[List[str]] = None
+    published: Optional[bool] = None
+    comment_count: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class PostSearchSummary(PostSummary):
+    score: Optional[float] = None
+
+
+PostPage = Union[PaginatedResponse[PostSummary], CursorPaginatedResponse[PostSummary]]
+
+PostSearchPage = Union[
+    PaginatedResponse[PostSearchSummary], CursorPaginatedResponse[PostSearchSummary]
+]
+
+
 class CategoryCreate(BaseModel):
     name: str
     description: str
@@ -47,10 +89,3 @@ class CategoryResponse(BaseModel):
 class CommentCreate(BaseModel):
     author: str
     content: str
-
-
-class CommentResponse(BaseModel):
-    id: str
-    author: str
-    content: str
-    created_at: datetime
@@ -1,4 +1,5 @@
 
+from .category_cache import CategoryCache, category_cache
 from .post_service import PostService
 
-__all__ = ["PostService"]
+__all__ = ["PostService", "CategoryCache", "category_cache"]
@@ -0,0 +1,385 @@
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+from beanie.operators import In
+from bson import DBRef, ObjectId
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.cache import cache
+from app.config import settings
+from app.models.category import Category
+from app.models.post import Comment, Post
+from app.schemas.bulk import (
+    CommentRecord,
+    ImportFailure,
+    ImportReport,
+    PostRecord,
+)
+from app.services.category_cache import category_cache
+from app.services.jobs import job_queue
+from app.services.search_index import title_index
+from app.services.stats_service import StatsService
+from app.services.trending import trending_ranker
+
+# Only the first failures are listed in a report; error_count has them all.
+MAX_REPORTED_ERRORS = 100
+
+Batch = List[Tuple[int, PostRecord]]
+
+
+async def _bulk_write(
+    collection, operations: List[UpdateOne]
+) -> Tuple[Dict[int, ObjectId], int, Dict[int, str]]:
+    """Run an unordered bulk write; return (upserted ids, matched, failures)."""
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        return dict(result.upserted_ids), result.matched_count, {}
+    except BulkWriteError as exc:
+        details = exc.details
+        upserted = {entry["index"]: entry["_id"] for entry in details["upserted"]}
+        failed = {error["index"]: error["errmsg"] for error in details["writeErrors"]}
+        return upserted, details["nMatched"], failed
+
+
+class BulkService:
+    """NDJSON import and export of posts with their comments."""
+
+    @staticmethod
+    def _fail(report: ImportReport, line: int, error: str):
+        report.error_count += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(ImportFailure(line=line, error=error))
+
+    @staticmethod
+    async def _resolve_categories(names: List[str]) -> Dict[str, ObjectId]:
+        """Category ids by name, creating the ones that do not exist yet."""
+        missing = [name for name in names if not category_cache.get_by_name(name)]
+        if missing:
+            await Category.get_pymongo_collection().bulk_write(
+                [
+                    UpdateOne(
+                        {"name": name},
+                        {"$setOnInsert": {"name": name, "description": ""}},
+                        upsert=True,
+                    )
+                    for name in missing
+                ],
+                ordered=False,
+            )
+            for category in await Category.find(In(Category.name, missing)).to_list():
+                category_cache.put(category)
+            await cache.invalidate("categories")
+        return {
+            name: category_cache.get_by_name(name).id
+            for name in names
+            if category_cache.get_by_name(name)
+        }
+
+    @staticmethod
+    def _post_operation(
+        record: PostRecord, category_id: Optional[ObjectId], now: datetime
+    ) -> UpdateOne:
+        fields = {
+            "title": record.title,
+            "content": record.content,
+            "author_id": record.author_id,
+            "author_name": record.author_name,
+            "category": (
+                DBRef(Category.get_collection_name(), category_id)
+                if category_id
+                else None
+            ),
+            "tags": record.tags,
+            "published": record.published,
+            "updated_at": record.updated_at or now,
+        }
+        on_insert = {"comment_count": 0, "latest_comments": []}
+        if record.created_at:
+            fields["created_at"] = record.created_at
+        else:
+            on_insert["created_at"] = now
+
+        if record.id:
+            key = {"_id": ObjectId(record.id)}
+        else:
+            key = {"author_id": record.author_id, "title": record.title}
+        return UpdateOne(key, {"$set": fields, "$setOnInsert": on_insert}, upsert=True)
+
+    @staticmethod
+    def _comment_operation(
+        post_id: str, record: CommentRecord, now: datetime
+    ) -> UpdateOne:
+        document = {
+            "post_id": post_id,
+            "author": record.author,
+            "content": record.content,
+            "created_at": record.created_at or now,
+        }
+        if record.id:
+            key = {"_id": ObjectId(record.id)}
+        else:
+            key = {k: v for k, v in document.items() if k != "created_at"}
+            if record.created_at:
+                key["created_at"] = record.created_at
+        return UpdateOne(key, {"$setOnInsert": document}, upsert=True)
+
+    @staticmethod
+    def _merge_natural_keys(batch: Batch) -> Batch:
+        """Folds records without an id that share (author_id, title) into the
+        last of them, keeping every record's comments, as if they had come in
+        separate batches. Upserted together they would each insert a post."""
+        merged: Dict[Tuple[str, str], int] = {}
+        unique: Batch = []
+        for line, record in batch:
+            if record.id:
+                unique.append((line, record))
+                continue
+            key = (record.author_id, record.title)
+            if key in merged:
+                position = merged[key]
+                earlier = unique[position][1]
+                unique[position] = (
+                    line,
+                    record.model_copy(
+                        update={"comments": earlier.comments + record.comments}
+                    ),
+                )
+            else:
+                merged[key] = len(unique)
+                unique.append((line, record))
+        return unique
+
+    @staticmethod
+    async def _import_batch(batch: Batch, report: ImportReport, incremental: bool):
+        now = datetime.utcnow()
+        batch = BulkService._merge_natural_keys(batch)
+        categories = await BulkService._resolve_categories(
+            sorted({record.category for _, record in batch if record.category})
+        )
+        upserted, matched, failed = await _bulk_write(
+            Post.get_pymongo_collection(),
+            [
+                BulkService._post_operation(
+                    record, categories.get(record.category), now
+                )
+                for _, record in batch
+            ],
+        )
+        report.posts.inserted += len(upserted)
+        report.posts.updated += matched
+        for index, error in failed.items():
+            BulkService._fail(report, batch[index][0], error)
+        if incremental:
+            deltas = Counter()
+            for index in upserted:
+                record = batch[index][1]
+                deltas.update(
+                    StatsService.counters(
+                        record.author_name, categories.get(record.category), record.tags
+                    )
+                )
+            await StatsService.schedule(deltas)
+
+        # Existing posts matched on their natural key are looked up in one
+        # query so their comments can be attached.
+        post_ids: Dict[int, ObjectId] = dict(upserted)
+        by_key: Dict[Tuple[str, str], int] = {}
+        for index, (_, record) in enumerate(batch):
+            if index in failed or index in post_ids:
+                continue
+            if record.id:
+                post_ids[index] = ObjectId(record.id)
+            else:
+                by_key[record.author_id, record.title] = index
+        if by_key:
+            cursor = Post.get_pymongo_collection().find(
+                {
+                    "$or": [
+                        {"author_id": author_id, "title": title}
+                        for author_id, title in by_key
+                    ]
+                },
+                {"author_id": 1, "title": 1},
+            )
+            async for document in cursor:
+                index = by_key.get((document["author_id"], document["title"]))
+                if index is not None:
+                    post_ids[index] = document["_id"]
+
+        comment_operations: List[UpdateOne] = []
+        comment_sources: List[Tuple[int, str, CommentRecord]] = []
+        for index, post_id in post_ids.items():
+            line, record = batch[index]
+            for comment in record.comments:
+                comment_operations.append(
+                    BulkService._comment_operation(str(post_id), comment, now)
+                )
+                comment_sources.append((line, str(post_id), comment))
+        if comment_operations:
+            upserted, matched, failed = await _bulk_write(
+                Comment.get_pymongo_collection(), comment_operations
+            )
+            report.comments.inserted += len(upserted)
+            report.comments.updated += matched
+            for index, error in failed.items():
+                BulkService._fail(report, comment_sources[index][0], error)
+            if incremental:
+                await BulkService._comments_added(comment_sources, upserted, now)
+
+        # Imported posts and comments carry their own dates, which the
+        # periodic refresh would not look back to.
+        await trending_ranker.rescore(list(post_ids.values()))
+        await cache.invalidate(
+            "posts", "trending", *(f"post:{post_id}" for post_id in post_ids.values())
+        )
+
+    @staticmethod
+    async def _comments_added(
+        sources: List[Tuple[int, str, CommentRecord]],
+        upserted: Dict[int, ObjectId],
+        now: datetime,
+    ):
+        """Queues the comment count, preview and stats updates that creating
+        the newly inserted comments one by one would have."""
+        by_post: Dict[str, List[dict]] = {}
+        for index, comment_id in upserted.items():
+            _, post_id, record = sources[index]
+            by_post.setdefault(post_id, []).append(
+                {
+                    "id": str(comment_id),
+                    "author": record.author,
+                    "content": record.content,
+                    "created_at": record.created_at or now,
+                }
+            )
+        for post_id, previews in by_post.items():
+            previews.sort(key=lambda preview: preview["created_at"])
+            await job_queue.enqueue(
+                "post.comments_added", {"post_id": post_id, "comments": previews}
+            )
+
+    @staticmethod
+    def _parse(line: bytes, default_author: Optional[Tuple[str, str]]) -> PostRecord:
+        record = PostRecord.model_validate_json(line)
+        if default_author and not record.author_id:
+            record.author_id, record.author_name = default_author
+        if not record.author_id or not record.author_name:
+            raise ValueError("author_id and author_name are required")
+        ids = [record.id, *(comment.id for comment in record.comments)]
+        if any(value and not ObjectId.is_valid(value) for value in ids):
+            raise ValueError("Invalid id")
+        return record
+
+    @staticmethod
+    async def import_posts(
+        lines: AsyncIterable[bytes],
+        batch_size: int = settings.bulk_batch_size,
+        default_author: Optional[Tuple[str, str]] = None,
+        rebuild_stats: bool = True,
+    ) -> ImportReport:
+        """Upsert posts (one PostRecord per line) in unordered batches.
+
+        Bad lines are reported and skipped. With ``rebuild_stats`` the counters
+        and per-post comment counts are recomputed once at the end; otherwise
+        inserted posts and comments are counted as they are written, and
+        changes to the tags, category or author of updated posts are not
+        counted until the next rebuild.
+        """
+        report = ImportReport()
+        batch: Batch = []
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                batch.append((line_number, BulkService._parse(line, default_author)))
+            except ValidationError as exc:
+                errors = exc.errors(include_url=False)
+                BulkService._fail(
+                    report,
+                    line_number,
+                    "; ".join(
+                        f"{'.'.join(map(str, error['loc'])) or 'line'}: {error['msg']}"
+                        for error in errors
+                    ),
+                )
+                continue
+            except ValueError as exc:
+                BulkService._fail(report, line_number, str(exc))
+                continue
+            if len(batch) >= batch_size:
+                await BulkService._import_batch(batch, report, not rebuild_stats)
+                batch = []
+        if batch:
+            await BulkService._import_batch(batch, report, not rebuild_stats)
+
+        if report.posts.inserted or report.posts.updated:
+            if rebuild_stats:
+                await StatsService.rebuild()
+            if title_index.enabled:
+                await title_index.load()
+        return report
+
+    @staticmethod
+    async def export_posts(
+        published: Optional[bool] = None,
+        batch_size: int = settings.bulk_batch_size,
+    ) -> AsyncIterator[PostRecord]:
+        """Yield every post with its comments, reading the cursor in batches."""
+        cursor = (
+            Post.get_pymongo_collection()
+            .find({} if published is None else {"published": published})
+            .sort("_id", 1)
+            .batch_size(batch_size)
+        )
+        page: List[dict] = []
+        async for document in cursor:
+            page.append(document)
+            if len(page) == batch_size:
+                async for record in BulkService._export_page(page):
+                    yield record
+                page = []
+        async for record in BulkService._export_page(page):
+            yield record
+
+    @staticmethod
+    async def _export_page(documents: List[dict]) -> AsyncIterator[PostRecord]:
+        # Comments are read per page of posts rather than joined in, so a post
+        # with many of them is not limited by the size of one document.
+        comments: Dict[str, List[dict]] = {}
+        if documents:
+            cursor = (
+                Comment.get_pymongo_collection()
+                .find({"post_id": {"$in": [str(d["_id"]) for d in documents]}})
+                .sort([("post_id", 1), ("created_at", 1)])
+            )
+            async for comment in cursor:
+                comments.setdefault(comment["post_id"], []).append(comment)
+        for document in documents:
+            category = document.get("category")
+            category = await category_cache.get(category.id) if category else None
+            yield PostRecord(
+                id=str(document["_id"]),
+                title=document["title"],
+                content=document["content"],
+                author_id=document["author_id"],
+                author_name=document["author_name"],
+                category=category.name if category else None,
+                tags=document.get("tags", []),
+                published=document.get("published", False),
+                created_at=document.get("created_at"),
+                updated_at=document.get("updated_at"),
+                comments=[
+                    CommentRecord(
+                        id=str(comment["_id"]),
+                        author=comment["author"],
+                        content=comment["content"],
+                        created_at=comment.get("created_at"),
+                    )
+                    for comment in comments.get(str(document["_id"]), [])
+                ],
+            )
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Union
+
+from beanie.operators import In
+from bson import ObjectId
+
+from app.metrics import record_cache_lookup
+from app.models.category import Category
+
+logger = logging.getLogger(__name__)
+
+CategoryId = Union[str, ObjectId]
+
+
+class CategoryCache:
+    """Process-local id -> Category and name -> Category lookup tables."""
+
+    def __init__(self):
+        self._by_id: Dict[ObjectId, Category] = {}
+        self._by_name: Dict[str, Category] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _to_object_id(category_id: CategoryId) -> Optional[ObjectId]:
+        if isinstance(category_id, ObjectId):
+            return category_id
+        if ObjectId.is_valid(category_id):
+            return ObjectId(category_id)
+        return None
+
+    async def load(self):
+        categories = await Category.find_all().to_list()
+        self._by_id = {category.id: category for category in categories}
+        self._by_name = {category.name: category for category in categories}
+
+    def put(self, category: Category):
+        previous = self._by_id.get(category.id)
+        if previous and previous.name != category.name:
+            self._by_name.pop(previous.name, None)
+        self._by_id[category.id] = category
+        self._by_name[category.name] = category
+
+    def remove(self, category_id: ObjectId):
+        category = self._by_id.pop(category_id, None)
+        if category:
+            self._by_name.pop(category.name, None)
+
+    def all(self) -> List[Category]:
+        return list(self._by_id.values())
+
+    def get_by_name(self, name: str) -> Optional[Category]:
+        return self._by_name.get(name)
+
+    async def get(self, category_id: CategoryId) -> Optional[Category]:
+        categories = await self.get_many([category_id])
+        return next(iter(categories.values()), None)
+
+    async def get_many(
+        self, category_ids: Iterable[CategoryId]
+    ) -> Dict[ObjectId, Category]:
+        found: Dict[ObjectId, Category] = {}
+        missing: List[ObjectId] = []
+        for category_id in category_ids:
+            object_id = self._to_object_id(category_id)
+            if object_id is None:
+                continue
+            category = self._by_id.get(object_id)
+            if category:
+                found[object_id] = category
+            else:
+                missing.append(object_id)
+
+        record_cache_lookup("category", True, len(found))
+        record_cache_lookup("category", False, len(missing))
+
+        # Categories created by another worker are picked up on first use when
+        # the change stream is disabled.
+        if missing:
+            for category in await Category.find(In(Category.id, missing)).to_list():
+                self.put(category)
+                found[category.id] = category
+
+        return found
+
+    def start_watching(self):
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop_watching(self):
+        if self._watch_task is None:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
+
+    async def _watch(self):
+        collection = Category.get_pymongo_collection()
+        while True:
+            try:
+                async with await collection.watch(
+                    full_document="updateLookup"
+                ) as stream:
+                    # Anything written between the initial load and the stream
+                    # opening would otherwise be missed.
+                    await self.load()
+                    async for change in stream:
+                        self._apply_change(change)
+            except Exception:
+                logger.exception("Category change stream failed")
+                await asyncio.sleep(5)
+
+    def _apply_change(self, change: dict):
+        operation = change["operationType"]
+        if operation in ("insert", "update", "replace"):
+            document = change.get("fullDocument")
+            if document:
+                self.put(Category.model_validate(document))
+        elif operation == "delete":
+            self.remove(change["documentKey"]["_id"])
+
+
+category_cache = CategoryCache()
@@ -0,0 +1,44 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, document_id: ObjectId) -> str:
+    raw = json.dumps([created_at.isoformat(), str(document_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, document_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), ObjectId(document_id)
+    except (binascii.Error, InvalidId, TypeError, ValueError) as exc:
+        raise InvalidCursorError("Invalid cursor") from exc
+
+
+def keyset_filter(
+    cursor: str, descending: bool = True, id_field: str = "_id", as_string: bool = False
+) -> dict:
+    """Match documents after the cursor in (created_at, ``id_field``) order.
+
+    ``as_string`` compares ids stored as strings rather than ObjectIds.
+    """
+    created_at, document_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    value = str(document_id) if as_string else document_id
+    return {
+        "$or": [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, id_field: {op: value}},
+        ]
+    }
@@ -0,0 +1,249 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.config import settings
+from app.models.follow import Follow, FollowerCount, TimelineEntry
+from app.models.post import Post
+from app.services.cursor import encode_cursor, keyset_filter
+from app.services.jobs import job_queue
+
+# Followers handled per timeline insert during a fan-out.
+FANOUT_BATCH_SIZE = 1000
+# Recent posts of an author copied into a new follower's timeline.
+BACKFILL_POSTS = 50
+
+FeedPage = Tuple[List[Tuple[datetime, str]], Optional[str]]
+
+
+async def _insert_entries(entries: List[dict]):
+    # Entries already there come from an earlier, retried fan-out.
+    if not entries:
+        return
+    try:
+        await TimelineEntry.get_pymongo_collection().insert_many(entries, ordered=False)
+    except BulkWriteError as exc:
+        if any(error["code"] != 11000 for error in exc.details["writeErrors"]):
+            raise
+
+
+def _entry(owner_id: str, post_id: str, author_id: str, created_at: datetime):
+    return {
+        "owner_id": owner_id,
+        "post_id": post_id,
+        "author_id": author_id,
+        "created_at": created_at,
+    }
+
+
+class FeedService:
+    """Follows and the following feed.
+
+    Posts of authors with at most FEED_FANOUT_MAX_FOLLOWERS followers are
+    copied into each follower's timeline when published (fan-out on write), so
+    a feed page is one range scan of the timelines collection. Posts of
+    authors with more followers are not copied; feed reads merge them in from
+    the posts collection (fan-out on read). An author's mode is decided by
+    their follower count at the time, so posts published while over the
+    threshold are missing from timelines if the author later drops under it.
+    """
+
+    @staticmethod
+    async def _add_followers(author_id: str, delta: int) -> int:
+        # A failure between the Follow write and this one leaves the count
+        # off until recount_followers (run by rebuild-stats) corrects it.
+        document = await FollowerCount.get_pymongo_collection().find_one_and_update(
+            {"_id": author_id},
+            {"$inc": {"followers": delta}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return document["followers"]
+
+    @staticmethod
+    async def recount_followers() -> int:
+        """Sets every author's FollowerCount from the follows collection;
+        returns how many counts were wrong."""
+        cursor = await Follow.get_pymongo_collection().aggregate(
+            [{"$group": {"_id": "$author_id", "followers": {"$sum": 1}}}]
+        )
+        actual = {document["_id"]: document["followers"] async for document in cursor}
+        operations = []
+        async for document in FollowerCount.get_pymongo_collection().find():
+            followers = actual.pop(document["_id"], 0)
+            if document["followers"] != followers:
+                operations.append(
+                    UpdateOne(
+                        {"_id": document["_id"]}, {"$set": {"followers": followers}}
+                    )
+                )
+        operations.extend(
+            UpdateOne(
+                {"_id": author_id}, {"$set": {"followers": followers}}, upsert=True
+            )
+            for author_id, followers in actual.items()
+        )
+        for start in range(0, len(operations), FANOUT_BATCH_SIZE):
+            await FollowerCount.get_pymongo_collection().bulk_write(
+                operations[start : start + FANOUT_BATCH_SIZE], ordered=False
+            )
+        return len(operations)
+
+    @staticmethod
+    async def _fans_out(author_id: str) -> bool:
+        document = await FollowerCount.get_pymongo_collection().find_one(
+            {"_id": author_id}
+        )
+        followers = document["followers"] if document else 0
+        return followers <= settings.feed_fanout_max_followers
+
+    @staticmethod
+    async def follow(follower_id: str, author_id: str) -> bool:
+        """Returns False when the user already follows the author."""
+        try:
+            await Follow(follower_id=follower_id, author_id=author_id).insert()
+        except DuplicateKeyError:
+            return False
+        followers = await FeedService._add_followers(author_id, 1)
+        if followers <= settings.feed_fanout_max_followers:
+            recent = (
+                Post.get_pymongo_collection()
+                .find({"author_id": author_id, "published": True}, {"created_at": 1})
+                .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+                .limit(BACKFILL_POSTS)
+            )
+            await _insert_entries(
+                [
+                    _entry(follower_id, str(post["_id"]), author_id, post["created_at"])
+                    async for post in recent
+                ]
+            )
+        return True
+
+    @staticmethod
+    async def unfollow(follower_id: str, author_id: str) -> bool:
+        result = await Follow.get_pymongo_collection().delete_one(
+            {"follower_id": follower_id, "author_id": author_id}
+        )
+        if not result.deleted_count:
+            return False
+        await FeedService._add_followers(author_id, -1)
+        await TimelineEntry.get_pymongo_collection().delete_many(
+            {"owner_id": follower_id, "author_id": author_id}
+        )
+        return True
+
+    @staticmethod
+    async def post_published(post: Post):
+        await job_queue.enqueue(
+            "feed.fan_out",
+            {
+                "post_id": str(post.id),
+                "author_id": post.author_id,
+                "created_at": post.created_at,
+            },
+        )
+
+    @staticmethod
+    async def post_withdrawn(post_id: str):
+        await job_queue.enqueue("feed.withdraw", {"post_id": post_id})
+
+    @staticmethod
+    async def _fan_out(payload: dict):
+        author_id = payload["author_id"]
+        if not await FeedService._fans_out(author_id):
+            return
+        followers = Follow.get_pymongo_collection().find(
+            {"author_id": author_id}, {"follower_id": 1}, batch_size=FANOUT_BATCH_SIZE
+        )
+        batch = []
+        async for follow in followers:
+            batch.append(
+                _entry(
+                    follow["follower_id"],
+                    payload["post_id"],
+                    author_id,
+                    payload["created_at"],
+                )
+            )
+            if len(batch) == FANOUT_BATCH_SIZE:
+                await _insert_entries(batch)
+                batch = []
+        await _insert_entries(batch)
+
+    @staticmethod
+    async def _withdraw(payload: dict):
+        await TimelineEntry.get_pymongo_collection().delete_many(
+            {"post_id": payload["post_id"]}
+        )
+
+    @staticmethod
+    async def page(user_id: str, cursor: Optional[str], size: int) -> FeedPage:
+        """(created_at, post id) of the next ``size`` feed posts, newest first,
+        and the cursor after them. Entries can point at posts deleted or
+        unpublished since; callers drop those when loading them."""
+        followed = [
+            follow["author_id"]
+            async for follow in Follow.get_pymongo_collection().find(
+                {"follower_id": user_id}, {"author_id": 1}
+            )
+        ]
+        if not followed:
+            return [], None
+
+        filters = {"owner_id": user_id}
+        if cursor:
+            filters = {
+                "$and": [
+                    filters,
+                    keyset_filter(cursor, id_field="post_id", as_string=True),
+                ]
+            }
+        timeline = (
+            TimelineEntry.get_pymongo_collection()
+            .find(filters, {"post_id": 1, "created_at": 1})
+            .sort([("created_at", DESCENDING), ("post_id", DESCENDING)])
+            .limit(size + 1)
+        )
+        entries = {(entry["created_at"], entry["post_id"]) async for entry in timeline}
+
+        pulled = [
+            document["_id"]
+            async for document in FollowerCount.get_pymongo_collection().find(
+                {
+                    "_id": {"$in": followed},
+                    "followers": {"$gt": settings.feed_fanout_max_followers},
+                },
+                {"_id": 1},
+            )
+        ]
+        if pulled:
+            filters = {"author_id": {"$in": pulled}, "published": True}
+            if cursor:
+                filters = {"$and": [filters, keyset_filter(cursor)]}
+            posts = (
+                Post.get_pymongo_collection()
+                .find(filters, {"created_at": 1})
+                .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+                .limit(size + 1)
+            )
+            # A set: posts from before the author passed the threshold are in
+            # the timeline as well.
+            entries.update(
+                {(post["created_at"], str(post["_id"])) async for post in posts}
+            )
+
+        ordered = sorted(entries, reverse=True)
+        next_cursor = None
+        if len(ordered) > size:
+            ordered = ordered[:size]
+            created_at, post_id = ordered[-1]
+            next_cursor = encode_cursor(created_at, ObjectId(post_id))
+        return ordered, next_cursor
+
+
+job_queue.register("feed.fan_out", FeedService._fan_out)
+job_queue.register("feed.withdraw", FeedService._withdraw)
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from app.config import settings
+from app.metrics import BACKGROUND_JOBS
+from app.models.job import OutboxJob
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+# Seconds stop() waits for queued jobs before handing them back to the outbox.
+DRAIN_SECONDS = 10.0
+
+
+class JobQueue:
+    """Runs post-write side effects (counters, previews, cache invalidation)
+    off the request path.
+
+    Every job is written to the outbox collection before it is queued, so it
+    survives the process dying once it is there. The outbox write is separate
+    from the write the job follows, though: a crash between the two loses that
+    job's side effects. Jobs are claimed with a lease; a job whose
+    lease runs out is picked up again by the poller of any worker, which means
+    handlers run at least once and must tolerate running twice. Failures are
+    retried with exponential backoff and parked as "failed" after
+    JOB_MAX_ATTEMPTS. With JOB_WORKERS=0 handlers run inline instead.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler):
+        self._handlers[kind] = handler
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @staticmethod
+    def _lease() -> datetime:
+        return datetime.utcnow() + timedelta(seconds=settings.job_lease_seconds)
+
+    async def enqueue(self, kind: str, payload: dict):
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job {kind!r}")
+        if settings.job_workers <= 0:
+            await self._handlers[kind](payload)
+            return
+
+        # Claimed for this process straight away when a local worker can take
+        # it; otherwise left pending for whichever poller gets there first.
+        local = self.running and not self._queue.full()
+        job = OutboxJob(kind=kind, payload=payload)
+        if local:
+            job.status = "running"
+            job.attempts = 1
+            job.locked_until = self._lease()
+        await job.insert()
+        if local:
+            try:
+                self._queue.put_nowait(job)
+            except asyncio.QueueFull:
+                await self._release([job])
+
+    def start(self):
+        if self.running or settings.job_workers <= 0:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.job_queue_size)
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(settings.job_workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._poll()))
+
+    async def stop(self):
+        if not self.running:
+            return
+        *workers, poller = self._tasks
+        poller.cancel()
+        try:
+            await asyncio.wait_for(self._queue.join(), DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Stopping with %d background jobs queued", self._queue.qsize()
+            )
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        await self._release(leftover)
+        self._tasks = []
+        self._queue = None
+
+    async def _release(self, jobs: List[OutboxJob]):
+        """Hand claimed jobs back to the outbox without counting an attempt."""
+        if not jobs:
+            return
+        try:
+            await OutboxJob.get_pymongo_collection().update_many(
+                {"_id": {"$in": [job.id for job in jobs]}},
+                {
+                    "$set": {"status": "pending", "locked_until": None},
+                    "$inc": {"attempts": -1},
+                },
+            )
+        except PyMongoError as exc:
+            # Their leases expire and they are claimed again anyway.
+            logger.warning("Could not release %d background jobs: %s", len(jobs), exc)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: OutboxJob):
+        collection = OutboxJob.get_pymongo_collection()
+        try:
+            if job.attempts > settings.job_max_attempts:
+                raise RuntimeError("Gave up after its lease expired too often")
+            handler = self._handlers.get(job.kind)
+            if handler is None:
+                raise LookupError(f"No handler registered for job {job.kind!r}")
+            await handler(job.payload)
+        except Exception as exc:
+            await self._failed(job, exc)
+            return
+
+        BACKGROUND_JOBS.labels(job.kind, "done").inc()
+        try:
+            await collection.delete_one({"_id": job.id})
+        except PyMongoError as exc:
+            logger.warning("Could not clear background job %s: %s", job.id, exc)
+
+    async def _failed(self, job: OutboxJob, exc: Exception):
+        update = {"locked_until": None, "last_error": repr(exc)}
+        if job.attempts >= settings.job_max_attempts:
+            update["status"] = "failed"
+            BACKGROUND_JOBS.labels(job.kind, "failed").inc()
+            logger.error("Background job %s (%s) failed: %r", job.id, job.kind, exc)
+        else:
+            delay = settings.job_retry_base_seconds * 2 ** (job.attempts - 1)
+            update["status"] = "pending"
+            update["run_after"] = datetime.utcnow() + timedelta(seconds=delay)
+            BACKGROUND_JOBS.labels(job.kind, "retried").inc()
+            logger.warning(
+                "Background job %s (%s) failed, retrying in %.1fs: %r",
+                job.id,
+                job.kind,
+                delay,
+                exc,
+            )
+        try:
+            await OutboxJob.get_pymongo_collection().update_one(
+                {"_id": job.id}, {"$set": update}
+            )
+        except PyMongoError as error:
+            logger.warning("Could not reschedule background job %s: %s", job.id, error)
+
+    async def _poll(self):
+        # Picks up jobs enqueued while the local queue was full, retries whose
+        # backoff has passed, and jobs left behind by a worker that died.
+        while True:
+            try:
+                await self._claim_due()
+            except Exception:
+                logger.exception("Polling the outbox failed")
+            await asyncio.sleep(settings.job_poll_seconds)
+
+    async def _claim_due(self):
+        collection = OutboxJob.get_pymongo_collection()
+        while not self._queue.full():
+            now = datetime.utcnow()
+            document = await collection.find_one_and_update(
+                {
+                    "$or": [
+                        {"status": "pending", "run_after": {"$lte": now}},
+                        {"status": "running", "locked_until": {"$lte": now}},
+                    ]
+                },
+                {
+                    "$set": {"status": "running", "locked_until": self._lease()},
+                    "$inc": {"attempts": 1},
+                },
+                sort=[("run_after", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if document is None:
+                return
+            self._queue.put_nowait(OutboxJob.model_validate(document))
+
+
+job_queue = JobQueue()
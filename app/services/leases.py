@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.models.lease import Lease
+
+
+async def acquire_lease(name: str, seconds: float) -> Optional[str]:
+    """Take the lease ``name`` for ``seconds``; returns the owner token to
+    release it with, or None while another process holds it."""
+    owner = uuid.uuid4().hex
+    now = datetime.utcnow()
+    try:
+        # Matches only an expired lease; a live one makes the upsert insert a
+        # second document with the same _id, which fails.
+        await Lease.get_pymongo_collection().update_one(
+            {"_id": name, "expires_at": {"$lte": now}},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return None
+    return owner
+
+
+async def release_lease(name: str, owner: str):
+    await Lease.get_pymongo_collection().delete_one({"_id": name, "owner": owner})
@@ -1,27 +1,63 @@
+import asyncio
+import re
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Set, Type
 
-from beanie.operators import In
-from bson import ObjectId
+from bson import DBRef, ObjectId, json_util
+from pymongo import ASCENDING, DESCENDING
 
+from app.cache import cache
+from app.config import settings
+from app.database.routing import listing_collection
+from app.metrics import record_cache_lookup
 from app.models.category import Category
-from app.models.post import Post
-from app.schemas.pagination import PaginatedResponse
-from app.schemas.post import PostCreate, PostResponse, PostUpdate
+from app.models.post import LATEST_COMMENTS_LIMIT, Comment, Post
+from app.schemas.pagination import CursorPaginatedResponse, PaginatedResponse
+from app.schemas.post import (
+    CommentCreate,
+    CommentResponse,
+    PostCreate,
+    PostPage,
+    PostResponse,
+    PostSearchPage,
+    PostSearchSummary,
+    PostSummary,
+    PostUpdate,
+)
+from app.services.category_cache import category_cache
+from app.services.cursor import encode_cursor, keyset_filter
+from app.services.feed_service import FeedService
+from app.services.jobs import job_queue
+from app.services.search_index import title_index
+from app.services.stats_service import StatsService
+from app.services.trending import initial_score
+from app.services.write_buffer import InsertBuffer
+
+# Characters of content shown in listings; the full text comes from get_post.
+EXCERPT_LENGTH = 200
+
+LIST_SORT = {"created_at": DESCENDING, "_id": DESCENDING}
+
+# PostSummary field -> (document key, projection). The excerpt is cut by
+# MongoDB so listings never transfer the full content.
+SUMMARY_PROJECTION = {
+    "title": ("title", 1),
+    "excerpt": ("excerpt", {"$substrCP": ["$content", 0, EXCERPT_LENGTH]}),
+    "author_id": ("author_id", 1),
+    "author_name": ("author_name", 1),
+    "category_name": ("category", 1),
+    "tags": ("tags", 1),
+    "published": ("published", 1),
+    "comment_count": ("comment_count", 1),
+    "created_at": ("created_at", 1),
+    "updated_at": ("updated_at", 1),
+}
 
 
 class PostService:
 
     @staticmethod
-    async def _post_to_response(post: Post) -> PostResponse:
-        category_name = None
-        if post.category:
-            try:
-                category = await post.category.fetch()
-                category_name = category.name
-            except AttributeError:
-                pass
-
+    def _build_response(post: Post, category_name: Optional[str]) -> PostResponse:
         return PostResponse(
             id=str(post.id),
             title=post.title,
@@ -31,20 +67,130 @@ class PostService:
             category_name=category_name,
             tags=post.tags,
             published=post.published,
+            comment_count=post.comment_count,
+            latest_comments=[
+                CommentResponse(**comment.model_dump())
+                for comment in post.latest_comments
+            ],
             created_at=post.created_at,
             updated_at=post.updated_at,
         )
 
     @staticmethod
-    async def _paginate_query(
-        query, page: int = 1, size: int = 10
-    ) -> PaginatedResponse[PostResponse]:
-        skip = (page - 1) * size
-        posts = await query.skip(skip).limit(size).to_list()
-        total = await query.count()
-        items: List[PostResponse] = [
-            await PostService._post_to_response(post) for post in posts
+    async def _posts_to_responses(posts: List[Post]) -> List[PostResponse]:
+        # Categories come from the in-process cache; only ids it has not seen
+        # yet are loaded, with a single $in query for the whole page.
+        category_ids = {
+            post.get_category_id() for post in posts if post.category is not None
+        }
+        categories = await category_cache.get_many(category_ids)
+        category_names = {
+            category_id: category.name for category_id, category in categories.items()
+        }
+
+        return [
+            PostService._build_response(
+                post, category_names.get(post.get_category_id())
+            )
+            for post in posts
+        ]
+
+    @staticmethod
+    async def _post_to_response(post: Post) -> PostResponse:
+        responses = await PostService._posts_to_responses([post])
+        return responses[0]
+
+    @staticmethod
+    async def _count_key(filters: dict, cache_count: bool = True) -> Optional[str]:
+        if not cache_count or settings.count_cache_ttl <= 0:
+            return None
+        return await cache.versioned_key(
+            f"count:{json_util.dumps(filters, sort_keys=True)}", "posts"
+        )
+
+    @staticmethod
+    async def _count(filters: dict, cache_count: bool = True) -> int:
+        key = await PostService._count_key(filters, cache_count)
+        total = await cache.get(key) if key else None
+        if key:
+            record_cache_lookup("count", total is not None)
+        if total is None:
+            total = await listing_collection(Post).count_documents(filters)
+            if key:
+                await cache.set(key, total, ttl=settings.count_cache_ttl)
+        return total
+
+    @staticmethod
+    def _summary_projection(fields: Optional[Set[str]] = None) -> dict:
+        # created_at is always read: cursors are built from it.
+        return {
+            key: value
+            for name, (key, value) in SUMMARY_PROJECTION.items()
+            if fields is None or name in fields or key == "created_at"
+        }
+
+    @staticmethod
+    async def _documents_to_summaries(
+        documents: List[dict],
+        fields: Optional[Set[str]] = None,
+        model: Type[PostSummary] = PostSummary,
+    ) -> List[PostSummary]:
+        category_ids = {
+            document["category"].id
+            for document in documents
+            if document.get("category") is not None
+        }
+        categories = await category_cache.get_many(category_ids)
+
+        selected = [
+            name for name in SUMMARY_PROJECTION if fields is None or name in fields
         ]
+        summaries = []
+        for document in documents:
+            values = {
+                name: document.get(SUMMARY_PROJECTION[name][0])
+                for name in selected
+                if name != "category_name"
+            }
+            if "category_name" in selected:
+                ref = document.get("category")
+                category = categories.get(ref.id) if ref is not None else None
+                values["category_name"] = category.name if category else None
+            if "score" in document:
+                values["score"] = document["score"]
+            # The projection guarantees the shape, so validation is skipped.
+            summaries.append(model.model_construct(id=str(document["_id"]), **values))
+        return summaries
+
+    @staticmethod
+    async def _aggregate(pipeline: List[dict]) -> List[dict]:
+        cursor = await listing_collection(Post).aggregate(pipeline)
+        return await cursor.to_list()
+
+    @staticmethod
+    async def _paginate_query(
+        filters: dict,
+        page: int = 1,
+        size: int = 10,
+        cache_count: bool = True,
+        fields: Optional[Set[str]] = None,
+    ) -> PaginatedResponse[PostSummary]:
+        # A plain pipeline, not a $facet branch, so the sort walks the
+        # listing index; the total is counted alongside it (or comes cached).
+        page_query = PostService._aggregate(
+            [
+                {"$match": filters},
+                {"$sort": LIST_SORT},
+                {"$skip": (page - 1) * size},
+                {"$limit": size},
+                {"$project": PostService._summary_projection(fields)},
+            ]
+        )
+        documents, total = await asyncio.gather(
+            page_query, PostService._count(filters, cache_count)
+        )
+
+        items = await PostService._documents_to_summaries(documents, fields)
         return PaginatedResponse(
             items=items,
             total=total,
@@ -53,44 +199,272 @@ class PostService:
             pages=(total + size - 1) // size,
         )
 
+    @staticmethod
+    async def _cursor_query(
+        filters: dict,
+        cursor: str,
+        size: int = 10,
+        with_total: bool = False,
+        cache_count: bool = True,
+        fields: Optional[Set[str]] = None,
+    ) -> CursorPaginatedResponse[PostSummary]:
+        # Counting is optional: it is the only part of a cursor page whose cost
+        # grows with the size of the result set.
+        match = {"$and": [filters, keyset_filter(cursor)]} if cursor else filters
+        page = PostService._aggregate(
+            [
+                {"$match": match},
+                {"$sort": LIST_SORT},
+                {"$limit": size + 1},
+                {"$project": PostService._summary_projection(fields)},
+            ]
+        )
+        if with_total:
+            documents, total = await asyncio.gather(
+                page, PostService._count(filters, cache_count)
+            )
+        else:
+            documents, total = await page, None
+
+        next_cursor = None
+        if len(documents) > size:
+            documents = documents[:size]
+            last = documents[-1]
+            next_cursor = encode_cursor(last["created_at"], last["_id"])
+
+        items = await PostService._documents_to_summaries(documents, fields)
+        return CursorPaginatedResponse(
+            items=items, size=size, next_cursor=next_cursor, total=total
+        )
+
+    @staticmethod
+    async def _list_query(
+        filters: dict,
+        page: int = 1,
+        size: int = 10,
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        cache_count: bool = True,
+        fields: Optional[Set[str]] = None,
+    ) -> PostPage:
+        if cursor is not None:
+            return await PostService._cursor_query(
+                filters, cursor, size, with_total, cache_count, fields
+            )
+        return await PostService._paginate_query(
+            filters, page, size, cache_count, fields
+        )
+
+    @staticmethod
+    async def _invalidate(post_id: Optional[str] = None):
+        # Counts and rendered listings share the "posts" namespace, so one
+        # version bump drops them all (in every worker with a shared cache,
+        # otherwise in this one; the others wait for the TTL).
+        namespaces = ["posts"]
+        if post_id:
+            namespaces.append(f"post:{post_id}")
+        await cache.invalidate(*namespaces)
+
     @staticmethod
     async def get_posts(
-        page: int = 1, size: int = 10
-    ) -> PaginatedResponse[PostResponse]:
-        query = Post.find(Post.published == True)
-        return await PostService._paginate_query(query, page, size)
+        page: int = 1,
+        size: int = 10,
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        fields: Optional[Set[str]] = None,
+    ) -> PostPage:
+        return await PostService._list_query(
+            {"published": True}, page, size, cursor, with_total, fields=fields
+        )
 
     @staticmethod
     async def get_posts_by_category(
-        category_id: str, page: int = 1, size: int = 10
-    ) -> PaginatedResponse[PostResponse]:
-        query = Post.find(
-            Post.published == True, Post.category.id == ObjectId(category_id)
+        category_id: str,
+        page: int = 1,
+        size: int = 10,
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        fields: Optional[Set[str]] = None,
+    ) -> PostPage:
+        filters = {"published": True, "category.$id": ObjectId(category_id)}
+        return await PostService._list_query(
+            filters, page, size, cursor, with_total, fields=fields
         )
 
-        return await PostService._paginate_query(query, page, size)
-
     @staticmethod
     async def get_posts_by_tag(
-        tag: str, page: int = 1, size: int = 10
-    ) -> PaginatedResponse[PostResponse]:
-        query = Post.find(Post.published == True, In(Post.tags, [tag]))
-        return await PostService._paginate_query(query, page, size)
+        tag: str,
+        page: int = 1,
+        size: int = 10,
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        fields: Optional[Set[str]] = None,
+    ) -> PostPage:
+        return await PostService._list_query(
+            {"published": True, "tags": tag},
+            page,
+            size,
+            cursor,
+            with_total,
+            fields=fields,
+        )
+
+    @staticmethod
+    async def get_posts_by_author(
+        author_id: str,
+        page: int = 1,
+        size: int = 10,
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        fields: Optional[Set[str]] = None,
+    ) -> PostPage:
+        return await PostService._list_query(
+            {"author_id": author_id, "published": True},
+            page,
+            size,
+            cursor,
+            with_total,
+            fields=fields,
+        )
+
+    @staticmethod
+    async def get_feed(
+        user_id: str,
+        cursor: Optional[str] = None,
+        size: int = 20,
+        fields: Optional[Set[str]] = None,
+    ) -> CursorPaginatedResponse[PostSummary]:
+        """Published posts of the authors ``user_id`` follows, newest first."""
+        entries, next_cursor = await FeedService.page(user_id, cursor, size)
+        ids = [ObjectId(post_id) for _, post_id in entries]
+        documents = await PostService._aggregate(
+            [
+                {"$match": {"_id": {"$in": ids}, "published": True}},
+                {"$project": PostService._summary_projection(fields)},
+            ]
+        )
+        position = {post_id: index for index, post_id in enumerate(ids)}
+        documents.sort(key=lambda document: position[document["_id"]])
+        items = await PostService._documents_to_summaries(documents, fields)
+        return CursorPaginatedResponse(items=items, size=size, next_cursor=next_cursor)
+
+    @staticmethod
+    async def _text_search(
+        query_str: str,
+        page: int = 1,
+        size: int = 10,
+        fields: Optional[Set[str]] = None,
+    ) -> PaginatedResponse[PostSearchSummary]:
+        filters = {"published": True, "$text": {"$search": query_str}}
+        page_query = PostService._aggregate(
+            [
+                {"$match": filters},
+                {"$addFields": {"score": {"$meta": "textScore"}}},
+                {"$sort": {"score": -1, "_id": -1}},
+                {"$skip": (page - 1) * size},
+                {"$limit": size},
+                {"$project": {**PostService._summary_projection(fields), "score": 1}},
+            ]
+        )
+        # Free-text filters rarely repeat, so their totals are not cached.
+        documents, total = await asyncio.gather(
+            page_query, PostService._count(filters, cache_count=False)
+        )
+        items = await PostService._documents_to_summaries(
+            documents, fields, PostSearchSummary
+        )
+        return PaginatedResponse(
+            items=items,
+            total=total,
+            page=page,
+            size=size,
+            pages=(total + size - 1) // size,
+        )
+
+    @staticmethod
+    async def _prefix_search(
+        query_str: str,
+        page: int = 1,
+        size: int = 10,
+        fields: Optional[Set[str]] = None,
+    ) -> PaginatedResponse[PostSearchSummary]:
+        post_ids = title_index.search(query_str)
+        total = len(post_ids)
+        page_ids = post_ids[(page - 1) * size : page * size]
+        positions = {post_id: position for position, post_id in enumerate(page_ids)}
+
+        documents = await PostService._aggregate(
+            [
+                {"$match": {"_id": {"$in": page_ids}, "published": True}},
+                {"$project": PostService._summary_projection(fields)},
+            ]
+        )
+        documents.sort(key=lambda document: positions[document["_id"]])
+
+        items = await PostService._documents_to_summaries(
+            documents, fields, PostSearchSummary
+        )
+        return PaginatedResponse(
+            items=items,
+            total=total,
+            page=page,
+            size=size,
+            pages=(total + size - 1) // size,
+        )
 
     @staticmethod
     async def search_posts(
-        query_str: str, page: int = 1, size: int = 10
-    ) -> PaginatedResponse[PostResponse]:
-        query = Post.find(
-            Post.published == True,
-            {
-                "$or": [
-                    {"title": {"$regex": query_str, "$options": "i"}},
-                    {"content": {"$regex": query_str, "$options": "i"}},
-                ]
-            },
+        query_str: str,
+        page: int = 1,
+        size: int = 10,
+        cursor: Optional[str] = None,
+        with_total: bool = False,
+        mode: str = "regex",
+        fields: Optional[Set[str]] = None,
+    ) -> PostSearchPage:
+        if mode == "text":
+            return await PostService._text_search(query_str, page, size, fields)
+        if mode == "prefix":
+            return await PostService._prefix_search(query_str, page, size, fields)
+
+        pattern = re.escape(query_str)
+        filters = {
+            "published": True,
+            "$or": [
+                {"title": {"$regex": pattern, "$options": "i"}},
+                {"content": {"$regex": pattern, "$options": "i"}},
+            ],
+        }
+        # Free-text filters rarely repeat, so their totals are not cached.
+        return await PostService._list_query(
+            filters, page, size, cursor, with_total, cache_count=False, fields=fields
         )
-        return await PostService._paginate_query(query, page, size)
+
+    @staticmethod
+    async def get_trending(
+        size: int = 10, fields: Optional[Set[str]] = None
+    ) -> CursorPaginatedResponse[PostSearchSummary]:
+        """Published posts with the highest trending score, as their score.
+
+        A single page: rankings move between requests, so there is no cursor.
+        """
+        documents = await PostService._aggregate(
+            [
+                {"$match": {"published": True}},
+                {"$sort": {"trending_score": DESCENDING}},
+                {"$limit": size},
+                {
+                    "$project": {
+                        **PostService._summary_projection(fields),
+                        "score": "$trending_score",
+                    }
+                },
+            ]
+        )
+        items = await PostService._documents_to_summaries(
+            documents, fields, model=PostSearchSummary
+        )
+        return CursorPaginatedResponse(items=items, size=size)
 
     @staticmethod
     async def get_post(post_id: str) -> Optional[PostResponse]:
@@ -105,6 +479,11 @@ class PostService:
         if not post:
             return False
         await post.delete()
+        await PostService._invalidate(post_id)
+        title_index.discard(post.id)
+        await StatsService.post_deleted(post)
+        if post.published:
+            await FeedService.post_withdrawn(post_id)
         return True
 
     @staticmethod
@@ -115,18 +494,34 @@ class PostService:
         if not post:
             return None
 
+        counters_before = StatsService.post_counters(post)
+        was_published = post.published
         update_dict = post_data.model_dump(exclude_unset=True)
         category_id = update_dict.pop("category_id", None)
         if category_id:
-            category = await Category.get(category_id)
+            category = await category_cache.get(category_id)
             if category:
                 post.category = category
+                update_dict["category"] = DBRef(
+                    Category.get_collection_name(), category.id
+                )
 
         for key, value in update_dict.items():
-            setattr(post, key, value)
+            if key != "category":
+                setattr(post, key, value)
 
         post.updated_at = datetime.utcnow()
-        await post.save()
+        update_dict["updated_at"] = post.updated_at
+        # $set only the edited fields so concurrent comment writes to
+        # comment_count/latest_comments are not overwritten.
+        await Post.find_one(Post.id == post.id).update({"$set": update_dict})
+        await PostService._invalidate(post_id)
+        title_index.sync(post)
+        await StatsService.post_updated(counters_before, post)
+        if post.published and not was_published:
+            await FeedService.post_published(post)
+        elif was_published and not post.published:
+            await FeedService.post_withdrawn(post_id)
 
         return await PostService._post_to_response(post)
 
@@ -137,11 +532,179 @@ class PostService:
         post_dict = post_data.model_dump()
         category_id = post_dict.pop("category_id", None)
         post = Post(**post_dict, author_id=author_id, author_name=author_name)
+        post.trending_score = initial_score(post.created_at)
 
         if category_id:
-            category = await Category.get(category_id)
+            category = await category_cache.get(category_id)
             if category:
                 post.category = category
 
         await post.insert()
+        await PostService._invalidate()
+        title_index.sync(post)
+        await StatsService.post_created(post)
+        if post.published:
+            await FeedService.post_published(post)
         return await PostService._post_to_response(post)
+
+    @staticmethod
+    async def post_exists(post_id: str) -> bool:
+        """Cheap existence check for writes that only need the post's id."""
+        if not ObjectId.is_valid(post_id):
+            return False
+        # Hits are only cached when the cache is shared: deleting the post
+        # bumps its namespace there for every worker, whereas a per-process
+        # cache would let other workers attach comments to a deleted post
+        # until the entry expired. Misses are never cached, so a new post is
+        # found straight away.
+        key = None
+        if cache.shared:
+            key = await cache.versioned_key(f"post-exists:{post_id}", f"post:{post_id}")
+            if await cache.get(key):
+                return True
+        exists = (
+            await Post.get_pymongo_collection().find_one(
+                {"_id": ObjectId(post_id)}, {"_id": 1}
+            )
+            is not None
+        )
+        if exists and key:
+            await cache.set(key, True, ttl=settings.response_cache_ttl)
+        return exists
+
+    @staticmethod
+    async def create_comment(
+        post_id: str, comment_data: CommentCreate
+    ) -> CommentResponse:
+        comment = Comment(post_id=post_id, **comment_data.model_dump())
+        await comment_buffer.insert(comment)
+        return PostService._comment_to_response(comment)
+
+    @staticmethod
+    async def _comments_written(comments: List[Comment]):
+        """Queues the post-side updates for a flushed batch, one job per post."""
+        by_post = {}
+        for comment in comments:
+            by_post.setdefault(comment.post_id, []).append(
+                PostService._comment_to_response(comment).model_dump()
+            )
+        for post_id, previews in by_post.items():
+            await job_queue.enqueue(
+                "post.comments_added", {"post_id": post_id, "comments": previews}
+            )
+
+    @staticmethod
+    async def _comments_added(payload: dict):
+        """Background half of create_comment: the post's counter and preview."""
+        post_id, comments = payload["post_id"], payload["comments"]
+        ids = [comment["id"] for comment in comments]
+        # Both halves tolerate the job running twice: the count is recounted
+        # rather than incremented (comments are never deleted on their own, so
+        # $max keeps a slower job from lowering it), and the preview is pushed
+        # only while it does not hold these comments yet.
+        comment_count = await Comment.get_pymongo_collection().count_documents(
+            {"post_id": post_id}
+        )
+        await Post.get_pymongo_collection().update_one(
+            {"_id": ObjectId(post_id), "latest_comments.id": {"$nin": ids}},
+            {
+                "$max": {"comment_count": comment_count},
+                "$push": {
+                    "latest_comments": {
+                        "$each": comments,
+                        "$sort": {"created_at": -1, "id": -1},
+                        "$slice": LATEST_COMMENTS_LIMIT,
+                    }
+                },
+            },
+        )
+        # The site-wide total is still incremented, so a retry after this
+        # point counts the comments twice until the next stats rebuild.
+        await StatsService.comment_created(len(comments))
+        # Listings show comment counts too but are left to expire by TTL, so a
+        # busy thread does not flush every cached listing page.
+        await cache.invalidate(f"post:{post_id}")
+
+    @staticmethod
+    async def _comment_added(payload: dict):
+        # Single-comment jobs written to the outbox before comments were
+        # batched.
+        await PostService._comments_added(
+            {"post_id": payload["post_id"], "comments": [payload["comment"]]}
+        )
+
+    @staticmethod
+    def _comment_to_response(comment: Comment) -> CommentResponse:
+        return CommentResponse(
+            id=str(comment.id),
+            author=comment.author,
+            content=comment.content,
+            created_at=comment.created_at,
+        )
+
+    @staticmethod
+    async def get_comments(
+        post_id: str, cursor: Optional[str] = None, size: int = 20
+    ) -> CursorPaginatedResponse[CommentResponse]:
+        query = Comment.find(Comment.post_id == post_id)
+        if cursor:
+            query = query.find(keyset_filter(cursor, descending=False))
+
+        comments = (
+            await query.sort([("created_at", ASCENDING), ("_id", ASCENDING)])
+            .limit(size + 1)
+            .to_list()
+        )
+        next_cursor = None
+        if len(comments) > size:
+            comments = comments[:size]
+            next_cursor = encode_cursor(comments[-1].created_at, comments[-1].id)
+
+        return CursorPaginatedResponse(
+            items=[PostService._comment_to_response(comment) for comment in comments],
+            size=size,
+            next_cursor=next_cursor,
+        )
+
+    @staticmethod
+    def iter_comments(
+        post_id: str,
+        cursor: Optional[str] = None,
+        batch_size: int = settings.stream_batch_size,
+    ) -> AsyncIterator[CommentResponse]:
+        """All comments of a post after ``cursor``, oldest first.
+
+        The cursor is decoded before iteration starts, so a bad one raises
+        InvalidCursorError here rather than halfway through a response.
+        """
+        filters = {"post_id": post_id}
+        if cursor:
+            filters.update(keyset_filter(cursor, descending=False))
+
+        async def iterate():
+            documents = (
+                Comment.get_pymongo_collection()
+                .find(filters)
+                .sort([("created_at", ASCENDING), ("_id", ASCENDING)])
+                .batch_size(batch_size)
+            )
+            async for document in documents:
+                yield CommentResponse(
+                    id=str(document["_id"]),
+                    author=document["author"],
+                    content=document["content"],
+                    created_at=document["created_at"],
+                )
+
+        return iterate()
+
+
+comment_buffer = InsertBuffer(
+    Comment,
+    max_batch=settings.comment_batch_size,
+    flush_ms=settings.comment_flush_ms,
+    on_flush=PostService._comments_written,
+)
+
+job_queue.register("post.comments_added", PostService._comments_added)
+job_queue.register("post.comment_added", PostService._comment_added)
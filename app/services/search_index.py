@@ -0,0 +1,125 @@
+import asyncio
+import bisect
+import logging
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from bson import ObjectId
+
+from app.config import settings
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class TitleIndex:
+    """In-process inverted index over published post titles for typeahead."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._postings: Dict[str, Set[ObjectId]] = defaultdict(set)
+        self._terms: List[str] = []
+        self._tokens: Dict[ObjectId, Set[str]] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def load(self):
+        postings: Dict[str, Set[ObjectId]] = defaultdict(set)
+        tokens: Dict[ObjectId, Set[str]] = {}
+        collection = Post.get_pymongo_collection()
+        async for document in collection.find(
+            {"published": True}, {"title": 1}, batch_size=5000
+        ):
+            post_tokens = set(tokenize(document["title"]))
+            tokens[document["_id"]] = post_tokens
+            for token in post_tokens:
+                postings[token].add(document["_id"])
+
+        self._postings = postings
+        self._terms = sorted(postings)
+        self._tokens = tokens
+
+    def add(self, post_id: ObjectId, title: str):
+        self.remove(post_id)
+        post_tokens = set(tokenize(title))
+        self._tokens[post_id] = post_tokens
+        for token in post_tokens:
+            if token not in self._postings:
+                bisect.insort(self._terms, token)
+            self._postings[token].add(post_id)
+
+    def discard(self, post_id: ObjectId):
+        if self.enabled:
+            self.remove(post_id)
+
+    def remove(self, post_id: ObjectId):
+        for token in self._tokens.pop(post_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(post_id)
+            if not postings:
+                del self._postings[token]
+                self._terms.pop(bisect.bisect_left(self._terms, token))
+
+    def sync(self, post: Post):
+        if not self.enabled:
+            return
+        if post.published:
+            self.add(post.id, post.title)
+        else:
+            self.remove(post.id)
+
+    def _prefix_matches(self, prefix: str) -> Set[ObjectId]:
+        matches: Set[ObjectId] = set()
+        start = bisect.bisect_left(self._terms, prefix)
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            matches |= self._postings[term]
+        return matches
+
+    def search(self, query: str) -> List[ObjectId]:
+        """Ids of posts whose title has a word starting with every query token.
+
+        Newest posts come first (ObjectIds grow with insertion time).
+        """
+        result: Optional[Set[ObjectId]] = None
+        for token in set(tokenize(query)):
+            matches = self._prefix_matches(token)
+            result = matches if result is None else result & matches
+            if not result:
+                return []
+        return sorted(result or (), reverse=True)
+
+    def start_refreshing(self, interval: float):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh(interval))
+
+    async def stop_refreshing(self):
+        if self._refresh_task is None:
+            return
+        self._refresh_task.cancel()
+        try:
+            await self._refresh_task
+        except asyncio.CancelledError:
+            pass
+        self._refresh_task = None
+
+    async def _refresh(self, interval: float):
+        # Writes handled by other workers only reach this index on reload.
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Title index refresh failed")
+
+
+title_index = TitleIndex(enabled=settings.title_index_enabled)
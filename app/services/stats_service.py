@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from typing import AsyncIterator, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+from app.cache import cache
+from app.config import settings
+from app.database.routing import listing_collection
+from app.models.post import LATEST_COMMENTS_LIMIT, Comment, Post
+from app.models.stats import StatCounter
+from app.services.jobs import job_queue
+from app.services.leases import acquire_lease, release_lease
+
+REBUILD_BATCH_SIZE = 1000
+REBUILD_LEASE = "stats.rebuild"
+# Longer than a rebuild takes; a process that dies mid-rebuild blocks the
+# next one for at most this long.
+REBUILD_LEASE_SECONDS = 600
+
+logger = logging.getLogger(__name__)
+
+
+def _counter_id(kind: str, key: str) -> str:
+    return f"{kind}:{key}"
+
+
+class StatsService:
+    """Counters behind /api/stats, kept up to date with $inc on every write."""
+
+    @staticmethod
+    def counters(
+        author_name: str, category_id: Optional[ObjectId], tags: List[str]
+    ) -> Counter:
+        counters = Counter({("total", "posts"): 1, ("author", author_name): 1})
+        if category_id is not None:
+            counters["category", str(category_id)] += 1
+        for tag in tags:
+            counters["tag", tag] += 1
+        return counters
+
+    @staticmethod
+    def post_counters(post: Post) -> Counter:
+        return StatsService.counters(
+            post.author_name, post.get_category_id(), post.tags
+        )
+
+    @staticmethod
+    async def apply(deltas: Counter):
+        operations = [
+            UpdateOne(
+                {"_id": _counter_id(kind, key)},
+                {"$inc": {"value": delta}, "$setOnInsert": {"kind": kind, "key": key}},
+                upsert=True,
+            )
+            for (kind, key), delta in deltas.items()
+            if delta
+        ]
+        if operations:
+            await StatCounter.get_pymongo_collection().bulk_write(
+                operations, ordered=False
+            )
+            await cache.invalidate("stats")
+
+    @staticmethod
+    async def schedule(deltas: Counter):
+        """Apply ``deltas`` on a background worker. Jobs run at least once, so
+        a retry after a partial failure can count a write twice."""
+        changed = [[kind, key, delta] for (kind, key), delta in deltas.items() if delta]
+        if changed:
+            await job_queue.enqueue("stats.apply", {"deltas": changed})
+
+    @staticmethod
+    async def _apply_job(payload: dict):
+        await StatsService.apply(
+            Counter({(kind, key): delta for kind, key, delta in payload["deltas"]})
+        )
+
+    @staticmethod
+    async def post_created(post: Post):
+        await StatsService.schedule(StatsService.post_counters(post))
+
+    @staticmethod
+    async def post_updated(before: Counter, post: Post):
+        deltas = StatsService.post_counters(post)
+        deltas.subtract(before)
+        await StatsService.schedule(deltas)
+
+    @staticmethod
+    async def post_deleted(post: Post):
+        deltas = Counter()
+        deltas.subtract(StatsService.post_counters(post))
+        await StatsService.schedule(deltas)
+
+    @staticmethod
+    async def comment_created(count: int = 1):
+        # Already runs inside the comments' background job. Per-post counts
+        # live on Post.comment_count.
+        await StatsService.apply(Counter({("total", "comments"): count}))
+
+    @staticmethod
+    async def top(kind: str, limit: Optional[int] = None) -> List[StatCounter]:
+        documents = (
+            listing_collection(StatCounter)
+            .find({"kind": kind, "value": {"$gt": 0}})
+            .sort("value", -1)
+            .limit(limit or 0)
+        )
+        return [StatCounter.model_validate(document) async for document in documents]
+
+    @staticmethod
+    async def iter_counters(
+        kind: Optional[str] = None, batch_size: int = settings.stream_batch_size
+    ) -> AsyncIterator[dict]:
+        documents = (
+            listing_collection(StatCounter)
+            .find({} if kind is None else {"kind": kind}, {"generation": 0})
+            .sort([("kind", 1), ("value", -1)])
+            .batch_size(batch_size)
+        )
+        async for document in documents:
+            yield document
+
+    @staticmethod
+    async def total(name: str) -> int:
+        counter = await listing_collection(StatCounter).find_one(
+            {"_id": _counter_id("total", name)}
+        )
+        return counter["value"] if counter else 0
+
+    @staticmethod
+    async def _aggregate_counts(kind: str, model, pipeline: List[dict]):
+        rows = await model.aggregate(pipeline).to_list()
+        return [(kind, str(row["_id"]), row["count"]) for row in rows if row["_id"]]
+
+    @staticmethod
+    async def _rebuild_comment_counts():
+        """Recompute Post.comment_count and Post.latest_comments from comments.
+
+        One pass over the posts: each is merged back with values computed from
+        its own comments, so a post never shows zeros while this runs, and
+        posts without comments get 0 and [] in the same write.
+        """
+        await Post.aggregate(
+            [
+                {"$project": {"_id": 1}},
+                {
+                    "$lookup": {
+                        "from": Comment.get_collection_name(),
+                        "let": {"post_id": {"$toString": "$_id"}},
+                        "pipeline": [
+                            {"$match": {"$expr": {"$eq": ["$post_id", "$$post_id"]}}},
+                            {
+                                "$group": {
+                                    "_id": None,
+                                    "count": {"$sum": 1},
+                                    "latest": {
+                                        "$topN": {
+                                            "n": LATEST_COMMENTS_LIMIT,
+                                            "sortBy": {"created_at": -1},
+                                            "output": {
+                                                "id": {"$toString": "$_id"},
+                                                "author": "$author",
+                                                "content": "$content",
+                                                "created_at": "$created_at",
+                                            },
+                                        }
+                                    },
+                                }
+                            },
+                        ],
+                        "as": "comments",
+                    }
+                },
+                {
+                    "$project": {
+                        "comment_count": {
+                            "$ifNull": [{"$first": "$comments.count"}, 0]
+                        },
+                        "latest_comments": {
+                            "$ifNull": [{"$first": "$comments.latest"}, []]
+                        },
+                    }
+                },
+                {
+                    "$merge": {
+                        "into": Post.get_collection_name(),
+                        "on": "_id",
+                        "whenMatched": "merge",
+                        "whenNotMatched": "discard",
+                    }
+                },
+            ]
+        ).to_list()
+
+    @staticmethod
+    async def rebuild() -> bool:
+        """Recompute every counter, and each post's comment_count, from scratch.
+
+        Writes that land while the rebuild runs may be counted twice or not at
+        all; run it when traffic is low or right after a bulk load. Only one
+        process rebuilds at a time; returns False if another one already is.
+        """
+        owner = await acquire_lease(REBUILD_LEASE, REBUILD_LEASE_SECONDS)
+        if owner is None:
+            logger.info("Stats rebuild skipped: another process is running one")
+            return False
+        try:
+            await StatsService._rebuild()
+        finally:
+            await release_lease(REBUILD_LEASE, owner)
+        return True
+
+    @staticmethod
+    async def _rebuild():
+        generation = uuid.uuid4().hex
+        total_posts, total_comments, *grouped = await asyncio.gather(
+            Post.count(),
+            Comment.count(),
+            StatsService._aggregate_counts(
+                "author", Post, [{"$sortByCount": "$author_name"}]
+            ),
+            StatsService._aggregate_counts(
+                "category",
+                Post,
+                [
+                    {"$match": {"category": {"$ne": None}}},
+                    {
+                        "$sortByCount": {
+                            "$getField": {
+                                "field": {"$literal": "$id"},
+                                "input": "$category",
+                            }
+                        }
+                    },
+                ],
+            ),
+            StatsService._aggregate_counts(
+                "tag", Post, [{"$unwind": "$tags"}, {"$sortByCount": "$tags"}]
+            ),
+        )
+        await StatsService._rebuild_comment_counts()
+
+        rows: List[Tuple[str, str, int]] = [
+            ("total", "posts", total_posts),
+            ("total", "comments", total_comments),
+        ]
+        for group in grouped:
+            rows.extend(group)
+
+        collection = StatCounter.get_pymongo_collection()
+        for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+            await collection.bulk_write(
+                [
+                    ReplaceOne(
+                        {"_id": _counter_id(kind, key)},
+                        {
+                            "kind": kind,
+                            "key": key,
+                            "value": count,
+                            "generation": generation,
+                        },
+                        upsert=True,
+                    )
+                    for kind, key, count in rows[start : start + REBUILD_BATCH_SIZE]
+                ],
+                ordered=False,
+            )
+        # Only rows of an earlier rebuild that this one did not rewrite, i.e.
+        # keys that no longer exist. Counters first created by apply() while
+        # this ran have no generation and are kept.
+        await collection.delete_many({"generation": {"$nin": [generation, None]}})
+        await cache.invalidate("stats", "posts")
+
+    @staticmethod
+    async def ensure_built():
+        if await StatCounter.get(_counter_id("total", "posts")) is None:
+            await StatsService.rebuild()
+
+
+job_queue.register("stats.apply", StatsService._apply_job)
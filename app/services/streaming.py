@@ -0,0 +1,58 @@
+from typing import AsyncIterable, AsyncIterator, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.config import settings
+
+StreamFormat = Literal["ndjson", "json"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+async def ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Split a stream of byte chunks into lines without buffering the body."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def encode_items(
+    items: AsyncIterable[BaseModel],
+    format: StreamFormat = "ndjson",
+    chunk_size: int = settings.stream_batch_size,
+) -> AsyncIterator[str]:
+    """Serialize models one at a time, flushing every ``chunk_size`` items.
+
+    Only one chunk is held in memory, whatever the number of items.
+    """
+    json_array = format == "json"
+    parts = ["["] if json_array else []
+    count = 0
+    async for item in items:
+        if json_array and count:
+            parts.append(",")
+        parts.append(item.model_dump_json(exclude_none=True))
+        if not json_array:
+            parts.append("\n")
+        count += 1
+        if count % chunk_size == 0:
+            yield "".join(parts)
+            parts = []
+    if json_array:
+        parts.append("]")
+    if parts:
+        yield "".join(parts)
+
+
+def stream_response(
+    items: AsyncIterable[BaseModel], format: StreamFormat = "ndjson"
+) -> StreamingResponse:
+    return StreamingResponse(
+        encode_items(items, format), media_type=MEDIA_TYPES[format]
+    )
@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.cache import cache
+from app.config import settings
+from app.models.post import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+# Scores are log2 of the decayed activity, measured from a fixed epoch so that
+# a post only needs rescoring when it gets new comments: everything else
+# decays at the same rate and keeps its rank.
+EPOCH = datetime(2020, 1, 1)
+# Publishing a post counts as this many comments made at that moment.
+POST_WEIGHT = 5.0
+# Posts rescored per round-trip.
+BATCH_SIZE = 1000
+# Comments looked at again on the next refresh, for writes that were still in
+# flight (or made by a worker with a slower clock) when this one ran.
+OVERLAP = timedelta(minutes=1)
+
+
+def _hours(value: datetime, since: datetime) -> float:
+    return (value - since).total_seconds() / 3600
+
+
+def initial_score(created_at: datetime) -> float:
+    """Score of a post without comments."""
+    half_lives = _hours(created_at, EPOCH) / settings.trending_half_life_hours
+    return half_lives + math.log2(POST_WEIGHT)
+
+
+async def _unscored_posts() -> AsyncIterator[ObjectId]:
+    async for document in Post.get_pymongo_collection().find(
+        {"trending_score": None}, {"_id": 1}, batch_size=BATCH_SIZE
+    ):
+        yield document["_id"]
+
+
+async def _commented_posts(since: datetime) -> AsyncIterator[ObjectId]:
+    cursor = await Comment.get_pymongo_collection().aggregate(
+        [
+            {"$match": {"created_at": {"$gte": since}}},
+            {"$group": {"_id": "$post_id"}},
+        ]
+    )
+    async for document in cursor:
+        if ObjectId.is_valid(document["_id"]):
+            yield ObjectId(document["_id"])
+
+
+class TrendingRanker:
+    """Keeps Post.trending_score up to date for the trending feed.
+
+    A post's score adds up its publication and each comment in the last
+    TRENDING_WINDOW_HOURS, every one of them halving in weight each
+    TRENDING_HALF_LIFE_HOURS. Every TRENDING_REFRESH_SECONDS the posts that
+    got comments since the previous run are rescored; on the first run, posts
+    that have no score yet are too. The feed is then a range read on the
+    (published, trending_score) index.
+    """
+
+    def __init__(self):
+        self._since: Optional[datetime] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def rescore(self, post_ids: List[ObjectId]):
+        for start in range(0, len(post_ids), BATCH_SIZE):
+            await self._rescore_batch(post_ids[start : start + BATCH_SIZE])
+
+    async def _rescore_all(self, post_ids: AsyncIterable[ObjectId]) -> int:
+        count = 0
+        batch: List[ObjectId] = []
+        async for post_id in post_ids:
+            batch.append(post_id)
+            if len(batch) == BATCH_SIZE:
+                await self._rescore_batch(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await self._rescore_batch(batch)
+            count += len(batch)
+        return count
+
+    async def _rescore_batch(self, ids: List[ObjectId]):
+        now = datetime.utcnow()
+        half_life_ms = settings.trending_half_life_hours * 3600 * 1000
+        # Weights are relative to now, so they stay within (0, 1] and cannot
+        # overflow however long the epoch is ago.
+        cursor = await Comment.get_pymongo_collection().aggregate(
+            [
+                {
+                    "$match": {
+                        "post_id": {"$in": [str(post_id) for post_id in ids]},
+                        "created_at": {
+                            "$gte": now
+                            - timedelta(hours=settings.trending_window_hours)
+                        },
+                    }
+                },
+                {
+                    "$group": {
+                        "_id": "$post_id",
+                        "weight": {
+                            "$sum": {
+                                "$exp": {
+                                    "$multiply": [
+                                        {"$subtract": ["$created_at", now]},
+                                        math.log(2) / half_life_ms,
+                                    ]
+                                }
+                            }
+                        },
+                    }
+                },
+            ]
+        )
+        comments = {document["_id"]: document["weight"] async for document in cursor}
+
+        score_now = _hours(now, EPOCH) / settings.trending_half_life_hours
+        operations = []
+        async for document in Post.get_pymongo_collection().find(
+            {"_id": {"$in": ids}}, {"created_at": 1}
+        ):
+            # log2 of the post's own weight relative to now; added in linear
+            # space only when there are comments, since it underflows to 0
+            # for posts a few years old.
+            activity = math.log2(POST_WEIGHT) + min(
+                _hours(document["created_at"], now) / settings.trending_half_life_hours,
+                0,
+            )
+            weight = comments.get(str(document["_id"]))
+            if weight:
+                activity = math.log2(2**activity + weight)
+            operations.append(
+                UpdateOne(
+                    {"_id": document["_id"]},
+                    {"$set": {"trending_score": score_now + activity}},
+                )
+            )
+        if operations:
+            await Post.get_pymongo_collection().bulk_write(operations, ordered=False)
+
+    async def refresh(self) -> int:
+        started = datetime.utcnow()
+        count = 0
+        if self._since is None:
+            since = started - timedelta(hours=settings.trending_window_hours)
+            count += await self._rescore_all(_unscored_posts())
+        else:
+            since = self._since
+        count += await self._rescore_all(_commented_posts(since))
+        self._since = started - OVERLAP
+        if count:
+            await cache.invalidate("trending")
+        return count
+
+    def start_refreshing(self, interval: float):
+        if self._refresh_task is None and interval > 0:
+            self._refresh_task = asyncio.create_task(self._refresh(interval))
+
+    async def stop_refreshing(self):
+        if self._refresh_task is None:
+            return
+        self._refresh_task.cancel()
+        try:
+            await self._refresh_task
+        except asyncio.CancelledError:
+            pass
+        self._refresh_task = None
+
+    async def _refresh(self, interval: float):
+        # Every worker rescores the same posts to the same values, so running
+        # it in several of them only repeats work.
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Trending refresh failed")
+            await asyncio.sleep(interval)
+
+
+trending_ranker = TrendingRanker()
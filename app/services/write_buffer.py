@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from beanie import Document, PydanticObjectId
+from pymongo.errors import BulkWriteError, WriteError
+
+logger = logging.getLogger(__name__)
+
+DocumentT = TypeVar("DocumentT", bound=Document)
+
+
+class InsertBuffer(Generic[DocumentT]):
+    """Coalesces inserts from concurrent requests into insert_many batches.
+
+    A document waits until ``max_batch`` are pending or ``flush_ms`` have
+    passed since the first of them, then the batch is written with one
+    unordered insert_many. Ids are assigned before queueing, so every caller
+    gets its own, and a caller whose document was not written gets the error.
+    ``on_flush`` runs with the documents written before their callers resume;
+    if it fails, the error is logged and the callers still succeed, since
+    their documents are stored.
+    With ``max_batch`` below 2 or ``flush_ms`` at 0 each insert goes alone.
+    """
+
+    def __init__(
+        self,
+        model: Type[DocumentT],
+        max_batch: int,
+        flush_ms: float,
+        on_flush: Optional[Callable[[List[DocumentT]], Awaitable[None]]] = None,
+    ):
+        self.model = model
+        self.max_batch = max_batch
+        self.flush_ms = flush_ms
+        self.on_flush = on_flush
+        self._pending: List[Tuple[DocumentT, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch > 1 and self.flush_ms > 0
+
+    async def insert(self, document: DocumentT) -> DocumentT:
+        if not self.enabled:
+            await document.insert()
+            await self._after_flush([document])
+            return document
+
+        if document.id is None:
+            document.id = PydanticObjectId()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((document, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_ms / 1000, self._flush)
+        # A caller that goes away still has its document written.
+        await future
+        return document
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def close(self):
+        """Write whatever is pending and wait for batches in flight."""
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def _after_flush(self, documents: List[DocumentT]):
+        if not self.on_flush:
+            return
+        try:
+            await self.on_flush(documents)
+        except Exception:
+            logger.exception(
+                "on_flush failed for %d written %s",
+                len(documents),
+                self.model.__name__,
+            )
+
+    async def _write(self, batch: List[Tuple[DocumentT, asyncio.Future]]):
+        documents = [document for document, _ in batch]
+        failed: Dict[int, Exception] = {}
+        try:
+            await self.model.insert_many(documents, ordered=False)
+        except BulkWriteError as exc:
+            for error in exc.details["writeErrors"]:
+                failed[error["index"]] = WriteError(
+                    error["errmsg"], error["code"], error
+                )
+        except Exception as exc:
+            # Nothing is known to be written, so every caller gets the error.
+            logger.warning(
+                "Inserting %d %s failed: %s", len(batch), self.model.__name__, exc
+            )
+            failed = dict.fromkeys(range(len(batch)), exc)
+
+        written = [
+            document for index, document in enumerate(documents) if index not in failed
+        ]
+        if written:
+            await self._after_flush(written)
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+            else:
+                future.set_result(None)
@@ -0,0 +1,171 @@
+"""Functional checks for code paths the load test does not exercise.
+
+Each check runs in-process against in-memory stand-ins (mongomock-motor for
+mongod, fakeredis for Redis) on a fresh database, and the script exits
+non-zero if any of them fails:
+
+    python -m benchmarks.checks
+    python -m benchmarks.checks --check bulk_import
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+from beanie import init_beanie
+from prometheus_client import REGISTRY
+
+from app.cache import RedisCache
+from app.config import settings
+from app.database.connection import DOCUMENT_MODELS
+from app.models.post import Comment, Post
+from app.services.bulk_service import BulkService
+from app.services.post_service import PostService
+from benchmarks import inmemory
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - optional dependency
+    fakeredis = None
+
+CHECKS: Dict[str, Callable[[], Awaitable[None]]] = {}
+
+
+def check(function: Callable[[], Awaitable[None]]):
+    CHECKS[function.__name__] = function
+    return function
+
+
+async def use_memory_database():
+    await init_beanie(
+        database=inmemory.create_client()["blog_checks"],
+        document_models=DOCUMENT_MODELS,
+    )
+
+
+async def lines(*records: str) -> AsyncIterator[bytes]:
+    for record in records:
+        yield record.encode()
+
+
+@check
+async def bulk_import():
+    """Timestamps with and without an offset, and missing ones, mix in one
+    import; stored dates are naive UTC."""
+    await use_memory_database()
+    # Stored dates keep milliseconds only.
+    before = datetime.utcnow().replace(microsecond=0)
+    report = await BulkService.import_posts(
+        lines(
+            '{"title": "aware", "content": "c", "author_id": "a1",'
+            ' "author_name": "alice", "created_at": "2024-01-01T00:00:00Z",'
+            ' "comments": [{"author": "bob", "content": "offset",'
+            ' "created_at": "2024-01-02T10:00:00+02:00"},'
+            ' {"author": "carol", "content": "undated"},'
+            ' {"author": "dave", "content": "naive",'
+            ' "created_at": "2024-01-02T09:00:00"}]}',
+            '{"title": "undated", "content": "c", "author_id": "a1",'
+            ' "author_name": "alice", "updated_at": "2024-03-01T12:00:00-05:00"}',
+        ),
+        rebuild_stats=False,
+    )
+    assert report.error_count == 0, report.errors
+    assert report.posts.inserted == 2, report.posts
+    assert report.comments.inserted == 3, report.comments
+
+    aware = await Post.find_one(Post.title == "aware")
+    assert aware.created_at == datetime(2024, 1, 1), aware.created_at
+    assert aware.comment_count == 3, aware.comment_count
+    # Not their order: mongomock honours only one key of a $push $sort.
+    assert {comment.content for comment in aware.latest_comments} == {
+        "undated",
+        "naive",
+        "offset",
+    }, aware.latest_comments
+    offset = await Comment.find_one(Comment.content == "offset")
+    assert offset.created_at == datetime(2024, 1, 2, 8), offset.created_at
+
+    undated = await Post.find_one(Post.title == "undated")
+    assert undated.created_at >= before, undated.created_at
+    assert undated.updated_at == datetime(2024, 3, 1, 17), undated.updated_at
+
+
+@check
+async def redis_cache():
+    """RedisCache round-trips, expires and versions entries, and treats an
+    unreachable server as a miss."""
+    if fakeredis is None:
+        raise RuntimeError("requires the 'fakeredis' package")
+    server = fakeredis.FakeServer()
+    cache = RedisCache(fakeredis.FakeAsyncRedis(server=server), default_ttl=0.05)
+    assert cache.shared
+
+    await cache.set("value", {"a": [1, "b"]})
+    assert await cache.get("value") == {"a": [1, "b"]}
+    await cache.set("forever", 1, ttl=60)
+    await cache.set("never", 1, ttl=0)
+    assert await cache.get("never") is None
+    await asyncio.sleep(0.1)
+    assert await cache.get("value") is None, "default TTL not applied"
+    assert await cache.get("forever") == 1
+    await cache.delete("forever")
+    assert await cache.get("forever") is None
+
+    key = await cache.versioned_key("page", "posts", "post:1")
+    assert key == "page#posts@0,post:1@0", key
+    await cache.set(key, "cached", ttl=60)
+    await cache.invalidate("post:1")
+    assert await cache.versions("posts", "post:1") == [0, 1]
+    assert await cache.get(await cache.versioned_key("page", "posts", "post:1")) is None
+
+    def errors(operation: str) -> float:
+        return (
+            REGISTRY.get_sample_value("cache_errors_total", {"operation": operation})
+            or 0.0
+        )
+
+    before = {operation: errors(operation) for operation in ("get", "invalidate")}
+    await cache.set(key, "cached", ttl=60)
+    server.connected = False
+    assert await cache.get(key) is None
+    await cache.set("down", 1)
+    await cache.invalidate("posts")
+    unknown = await cache.versioned_key("page", "posts", "post:1")
+    assert unknown != key, unknown
+    assert errors("get") == before["get"] + 1
+    assert errors("invalidate") == before["invalidate"] + 1
+    server.connected = True
+    assert await cache.get("down") is None
+    assert await cache.get(key) == "cached"
+
+
+async def run(names: List[str]) -> int:
+    # Background jobs run inline, so their effects are visible on return.
+    settings.job_workers = 0
+    assert PostService  # registers the post.* job handlers
+    failures = 0
+    for name in names:
+        try:
+            await CHECKS[name]()
+        except Exception as exc:
+            failures += 1
+            print(f"FAIL {name}: {type(exc).__name__}: {exc}", file=sys.stderr)
+        else:
+            print(f"ok   {name}", file=sys.stderr)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--check", action="append", choices=sorted(CHECKS), help="default all"
+    )
+    args = parser.parse_args()
+    failures = asyncio.run(run(args.check or list(CHECKS)))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Deterministic fixture data at benchmark volumes.
+
+Generalizes seed_db.py: the same categories plus more, authors, posts with
+Zipf-distributed tags, skewed comment counts and two years of timestamps. The
+same seed always produces the same documents, so baselines stay comparable.
+Documents are written straight to the collections in batches, the way the
+bulk importer does; rebuild the stats counters afterwards.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+from bson import DBRef, ObjectId
+
+from app.models.category import Category
+from app.models.post import LATEST_COMMENTS_LIMIT, Comment, Post
+
+CATEGORIES = [
+    ("Tech", "Технології та програмування"),
+    ("Life", "Життя і побут"),
+    ("Science", "Наука"),
+    ("Travel", "Подорожі"),
+    ("Food", "Їжа та рецепти"),
+    ("Books", "Книги"),
+    ("Music", "Музика"),
+    ("Sport", "Спорт"),
+    ("Design", "Дизайн"),
+    ("Business", "Бізнес"),
+]
+
+# Ordered by popularity; tag i is drawn with weight 1 / (i + 1).
+TAGS = [
+    "python", "async", "fastapi", "mongodb", "life", "javascript", "docker",
+    "devops", "testing", "performance", "databases", "web", "linux", "rust",
+    "go", "kubernetes", "security", "ml", "data", "cloud", "design", "career",
+    "books", "travel", "food", "music", "sport", "science", "history",
+    "productivity", "health", "photography", "gaming", "startups", "finance",
+    "education", "opensource", "api", "frontend", "backend",
+]  # fmt: skip
+
+WORDS = [
+    "asynchronous", "python", "database", "index", "query", "latency", "cache",
+    "server", "client", "request", "response", "pattern", "design", "system",
+    "memory", "thread", "event", "loop", "stream", "batch", "pipeline", "shard",
+    "replica", "cluster", "schema", "model", "service", "router", "endpoint",
+    "deploy", "container", "metric", "profile", "benchmark", "throughput",
+    "journey", "morning", "recipe", "garden", "mountain", "river", "history",
+    "science", "music", "novel", "painting", "coffee", "weekend", "travel",
+]  # fmt: skip
+
+COMMENT_AUTHORS = ["system", "guest", "bot", "reader", "anonymous", "editor"]
+
+AUTHORS = 50
+# Distinct content paragraphs; each post body picks several of them.
+PARAGRAPHS = 256
+MAX_COMMENTS_PER_POST = 500
+
+
+class Dataset:
+    """Generates posts and their comments in batches from a seeded RNG."""
+
+    def __init__(
+        self,
+        posts: int,
+        comments_per_post: float = 3.0,
+        published_ratio: float = 0.9,
+        seed: int = 42,
+    ):
+        self.posts = posts
+        self.comments_per_post = comments_per_post
+        self.published_ratio = published_ratio
+        self.rng = random.Random(seed)
+        self.now = datetime(2025, 1, 1)
+        self.authors = [
+            (str(self._object_id(self.now - timedelta(days=i))), f"author{i}")
+            for i in range(AUTHORS)
+        ]
+        self.paragraphs = [self._sentence(40, 120) for _ in range(PARAGRAPHS)]
+        self.tag_weights = [1 / (i + 1) for i in range(len(TAGS))]
+        self.category_ids: List[ObjectId] = []
+
+    def _object_id(self, when: datetime) -> ObjectId:
+        # Same layout as a server-generated id, but drawn from the seeded RNG.
+        return ObjectId(ObjectId.from_datetime(when).binary[:4] + self.rng.randbytes(8))
+
+    def _sentence(self, low: int, high: int) -> str:
+        words = self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        return " ".join(words).capitalize() + "."
+
+    def categories(self) -> List[dict]:
+        documents = [
+            {"_id": self._object_id(self.now), "name": name, "description": description}
+            for name, description in CATEGORIES
+        ]
+        self.category_ids = [document["_id"] for document in documents]
+        return documents
+
+    def _comments(self, post_id: ObjectId, created_at: datetime) -> List[dict]:
+        count = min(
+            int(self.rng.expovariate(1 / self.comments_per_post))
+            if self.comments_per_post
+            else 0,
+            MAX_COMMENTS_PER_POST,
+        )
+        comments = []
+        for i in range(count):
+            commented_at = created_at + timedelta(minutes=10 * (i + 1))
+            comments.append(
+                {
+                    "_id": self._object_id(commented_at),
+                    "post_id": str(post_id),
+                    "author": self.rng.choice(COMMENT_AUTHORS),
+                    "content": self._sentence(3, 30),
+                    "created_at": commented_at,
+                }
+            )
+        return comments
+
+    def post(self, index: int):
+        """One post document plus its comment documents."""
+        created_at = self.now - timedelta(
+            seconds=self.rng.randint(0, 2 * 365 * 24 * 3600)
+        )
+        post_id = self._object_id(created_at)
+        author_id, author_name = self.rng.choice(self.authors)
+        comments = self._comments(post_id, created_at)
+        latest = comments[-LATEST_COMMENTS_LIMIT:][::-1]
+        post = {
+            "_id": post_id,
+            "title": f"{self._sentence(3, 8)[:-1]} #{index}",
+            "content": "\n\n".join(
+                self.rng.choices(self.paragraphs, k=self.rng.randint(1, 6))
+            ),
+            "author_id": author_id,
+            "author_name": author_name,
+            "category": DBRef(
+                Category.Settings.name, self.rng.choice(self.category_ids)
+            )
+            if self.category_ids and self.rng.random() < 0.95
+            else None,
+            "tags": sorted(
+                set(self.rng.choices(TAGS, self.tag_weights, k=self.rng.randint(1, 5)))
+            ),
+            "published": self.rng.random() < self.published_ratio,
+            "comment_count": len(comments),
+            "latest_comments": [
+                {
+                    "id": str(comment["_id"]),
+                    "author": comment["author"],
+                    "content": comment["content"],
+                    "created_at": comment["created_at"],
+                }
+                for comment in latest
+            ],
+            "created_at": created_at,
+            "updated_at": comments[-1]["created_at"] if comments else created_at,
+        }
+        return post, comments
+
+
+async def seed(dataset: Dataset, batch_size: int = 1000, progress=None):
+    """Write the dataset to the collections Beanie was initialized with."""
+    categories = Category.get_pymongo_collection()
+    posts = Post.get_pymongo_collection()
+    comments = Comment.get_pymongo_collection()
+
+    await categories.insert_many(dataset.categories())
+    post_batch, comment_batch = [], []
+    for index in range(dataset.posts):
+        post, post_comments = dataset.post(index)
+        post_batch.append(post)
+        comment_batch.extend(post_comments)
+        if len(post_batch) >= batch_size:
+            await posts.insert_many(post_batch, ordered=False)
+            if comment_batch:
+                await comments.insert_many(comment_batch, ordered=False)
+            post_batch, comment_batch = [], []
+            if progress:
+                progress(index + 1)
+    if post_batch:
+        await posts.insert_many(post_batch, ordered=False)
+    if comment_batch:
+        await comments.insert_many(comment_batch, ordered=False)
+    if progress:
+        progress(dataset.posts)
@@ -0,0 +1,97 @@
+"""In-memory stand-in for mongod, for running the suite without a server.
+
+mongomock-motor (pip install mongomock-motor) lags behind the async pymongo
+API Beanie 2 uses, so a few methods are adapted here. Some operators are
+approximated ($substrCP counts bytes, $sortByCount is expanded) and others
+($text, $getField, ...) are missing, so endpoints using them report errors.
+Numbers from this backend only check the harness; baselines worth comparing
+come from a real mongod.
+"""
+
+try:
+    import mongomock.collection
+    import mongomock.database
+    from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+except ImportError:  # pragma: no cover - optional dependency
+    AsyncMongoMockClient = None
+
+
+class _AwaitableCursor:
+    # pymongo's async aggregate() is a coroutine returning a cursor;
+    # mongomock-motor returns the cursor directly.
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __await__(self):
+        async def cursor():
+            return self.cursor
+
+        return cursor().__await__()
+
+    def __aiter__(self):
+        return self.cursor.__aiter__()
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def _rewrite(value):
+    if isinstance(value, dict):
+        if "$substrCP" in value:
+            return {"$substr": _rewrite(value["$substrCP"])}
+        return {key: _rewrite(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rewrite(item) for item in value]
+    return value
+
+
+_patched = False
+
+
+def _patch():
+    global _patched
+    if _patched:
+        return
+    _patched = True
+    list_collection_names = mongomock.database.Database.list_collection_names
+
+    def list_names(self, filter=None, session=None, **kwargs):
+        return list_collection_names(self, filter, session)
+
+    aggregate = AsyncMongoMockCollection.aggregate
+
+    def aggregate_compat(self, pipeline, *args, **kwargs):
+        kwargs.pop("session", None)
+        stages = []
+        for stage in _rewrite(pipeline):
+            if "$sortByCount" in stage:
+                stages.append(
+                    {"$group": {"_id": stage["$sortByCount"], "count": {"$sum": 1}}}
+                )
+                stages.append({"$sort": {"count": -1}})
+            else:
+                stages.append(stage)
+        return _AwaitableCursor(aggregate(self, stages, *args, **kwargs))
+
+    def without_sort(add):
+        # pymongo passes the sort option of UpdateOne/ReplaceOne to every bulk
+        # operation; mongomock does not know it.
+        def add_compat(self, *args, sort=None, **kwargs):
+            return add(self, *args, **kwargs)
+
+        return add_compat
+
+    builder = mongomock.collection.BulkOperationBuilder
+    mongomock.database.Database.list_collection_names = list_names
+    AsyncMongoMockCollection.aggregate = aggregate_compat
+    builder.add_update = without_sort(builder.add_update)
+    builder.add_replace = without_sort(builder.add_replace)
+    # Read preferences mean nothing without replicas.
+    AsyncMongoMockCollection.with_options = lambda self, **kwargs: self
+
+
+def create_client():
+    if AsyncMongoMockClient is None:
+        raise RuntimeError("--backend memory requires the 'mongomock-motor' package")
+    _patch()
+    return AsyncMongoMockClient()
@@ -0,0 +1,392 @@
+"""Load test the read endpoints and record a latency/throughput baseline.
+
+Seeds a deterministic dataset (see benchmarks.dataset) into its own database,
+then drives each /api/posts*, /api/categories and /api/stats/* endpoint with
+a fixed number of requests at a fixed concurrency and reports p50/p95/p99
+latency and throughput per endpoint as JSON:
+
+    python -m benchmarks.load --posts 100000 --concurrency 32 \\
+        --output baseline.json
+    # ...change something...
+    python -m benchmarks.load --posts 100000 --concurrency 32 \\
+        --compare baseline.json
+
+Requests go through the app in-process by default; --url targets a running
+server instead (start it with DATABASE_NAME set to --database). --backend
+memory swaps mongod for mongomock-motor. An existing dataset with the same
+size is reused unless --reseed is given. Superuser-only endpoints (bulk
+import, export) are not exercised; --writes adds comment creation.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from beanie import init_beanie
+from pymongo.errors import OperationFailure
+
+from app.cache import cache
+from app.config import settings
+from app.database.connection import DOCUMENT_MODELS, create_client
+from app.models.category import Category
+from app.models.post import Post
+from app.services.category_cache import category_cache
+from app.services.stats_service import StatsService
+from benchmarks import inmemory
+from benchmarks.dataset import TAGS, WORDS, Dataset, seed
+
+# Ids sampled from the seeded data for path parameters.
+SAMPLE_SIZE = 2000
+PAGE_SIZE = 10
+
+
+class Sample:
+    """Random but reproducible path parameters drawn from the seeded data."""
+
+    def __init__(self, rng: random.Random, post_ids, category_ids, published: int):
+        self.rng = rng
+        self.post_ids = post_ids
+        self.category_ids = category_ids
+        self.last_page = max(1, math.ceil(published / PAGE_SIZE))
+
+    def post_id(self) -> str:
+        return self.rng.choice(self.post_ids)
+
+    def category_id(self) -> str:
+        return self.rng.choice(self.category_ids)
+
+    def tag(self) -> str:
+        return self.rng.choice(TAGS[:20])
+
+    def word(self) -> str:
+        return self.rng.choice(WORDS)
+
+    def page(self) -> int:
+        return self.rng.randint(1, min(20, self.last_page))
+
+    def deep_page(self) -> int:
+        return self.rng.randint(max(1, self.last_page // 2), self.last_page)
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: Callable[[Sample], str]
+    method: str = "GET"
+    body: Optional[Callable[[Sample], dict]] = None
+    write: bool = False
+
+
+SCENARIOS = [
+    Scenario("posts", lambda s: "/api/posts"),
+    Scenario("posts_page", lambda s: f"/api/posts?page={s.page()}"),
+    Scenario("posts_deep_page", lambda s: f"/api/posts?page={s.deep_page()}"),
+    Scenario("posts_cursor", lambda s: "/api/posts?cursor="),
+    Scenario("posts_with_total", lambda s: "/api/posts?cursor=&with_total=true"),
+    Scenario("posts_sparse", lambda s: "/api/posts?fields=title,created_at"),
+    Scenario("post", lambda s: f"/api/posts/{s.post_id()}"),
+    Scenario("post_comments", lambda s: f"/api/posts/{s.post_id()}/comments"),
+    Scenario(
+        "post_comments_stream",
+        lambda s: f"/api/posts/{s.post_id()}/comments?stream=ndjson",
+    ),
+    Scenario(
+        "posts_by_category",
+        lambda s: f"/api/posts/category/{s.category_id()}?page={s.page()}",
+    ),
+    Scenario("posts_by_tag", lambda s: f"/api/posts/tag/{s.tag()}?page={s.page()}"),
+    Scenario("search_text", lambda s: f"/api/posts/search/?q={s.word()}&mode=text"),
+    Scenario("search_regex", lambda s: f"/api/posts/search/?q={s.word()}&mode=regex"),
+    Scenario("categories", lambda s: "/api/categories"),
+    Scenario("category", lambda s: f"/api/categories/{s.category_id()}"),
+    Scenario("stats_top_authors", lambda s: "/api/stats/top-authors"),
+    Scenario("stats_popular_categories", lambda s: "/api/stats/popular-categories"),
+    Scenario("stats_comments", lambda s: "/api/stats/comments-stats"),
+    Scenario("stats_tags", lambda s: "/api/stats/tags-distribution"),
+    Scenario("stats_raw", lambda s: "/api/stats/raw"),
+    Scenario(
+        "comment_create",
+        lambda s: f"/api/posts/{s.post_id()}/comments",
+        method="POST",
+        body=lambda s: {"author": "bench", "content": f"Load test {s.word()}"},
+        write=True,
+    ),
+]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    errors = sum(
+        count for status, count in statuses.items() if not status.startswith("2")
+    )
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    sample: Sample,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = warmup
+
+    async def call(record: bool):
+        body = scenario.body(sample) if scenario.body else None
+        start = time.perf_counter()
+        try:
+            response = await client.request(
+                scenario.method, scenario.path(sample), json=body
+            )
+            status = str(response.status_code)
+        except Exception as exc:
+            status = type(exc).__name__
+        if record:
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+
+    async def worker(record: bool):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await call(record)
+
+    await asyncio.gather(*(worker(False) for _ in range(concurrency)))
+    remaining = requests
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(True) for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+async def prepare(args) -> Sample:
+    """Connect, seed unless an equal dataset is already there, and sample ids."""
+    if args.backend == "memory":
+        client = inmemory.create_client()
+    else:
+        settings.mongodb_url = args.mongodb_url or settings.mongodb_url
+        client = create_client()
+    database = client[args.database]
+
+    await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+    existing = await Post.get_pymongo_collection().count_documents({})
+    if args.reseed or existing != args.posts:
+        for model in DOCUMENT_MODELS:
+            await database.drop_collection(model.get_collection_name())
+        await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+        dataset = Dataset(args.posts, args.comments_per_post, seed=args.seed)
+        started = time.perf_counter()
+        await seed(
+            dataset,
+            progress=lambda done: print(
+                f"\rseeded {done} posts", end="", file=sys.stderr
+            ),
+        )
+        print(f" in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        try:
+            await StatsService.rebuild()
+        except OperationFailure as exc:
+            if args.backend != "memory":
+                raise
+            print(f"stats counters unavailable: {exc}", file=sys.stderr)
+    await category_cache.load()
+
+    published = await Post.get_pymongo_collection().count_documents({"published": True})
+    post_ids = [
+        str(document["_id"])
+        for document in await Post.get_pymongo_collection()
+        .find({"published": True}, {"_id": 1})
+        .limit(SAMPLE_SIZE)
+        .to_list()
+    ]
+    category_ids = [
+        str(document["_id"])
+        for document in await Category.get_pymongo_collection()
+        .find({}, {"_id": 1})
+        .to_list()
+    ]
+    return Sample(random.Random(args.seed), post_ids, category_ids, published)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, report: dict, tolerance: float) -> List[str]:
+    """Print p95 and throughput against the baseline; return the regressions."""
+    regressions = []
+    print(f"{'scenario':<26}{'p95 ms':>20}{'rps':>22}", file=sys.stderr)
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        p95 = result["p95_ms"] / before["p95_ms"] if before["p95_ms"] else 1.0
+        rps = (
+            result["throughput_rps"] / before["throughput_rps"]
+            if before["throughput_rps"]
+            else 1.0
+        )
+        slower = p95 > 1 + tolerance or rps < 1 - tolerance
+        if slower:
+            regressions.append(name)
+        print(
+            f"{name:<26}{before['p95_ms']:>9.2f} -> {result['p95_ms']:>7.2f}"
+            f"{before['throughput_rps']:>10.0f} -> {result['throughput_rps']:>7.0f}"
+            f"{'  REGRESSED' if slower else ''}",
+            file=sys.stderr,
+        )
+    return regressions
+
+
+async def main_async(args) -> dict:
+    sample = await prepare(args)
+    if args.no_cache:
+        cache.default_ttl = 0
+        settings.count_cache_ttl = 0
+
+    client = open_client(args.url)
+
+    selected = set(args.scenario or [])
+    results: Dict[str, dict] = {}
+    async with client:
+        for scenario in SCENARIOS:
+            if selected and scenario.name not in selected:
+                continue
+            if scenario.write and not args.writes:
+                continue
+            result = await run_scenario(
+                client,
+                scenario,
+                sample,
+                args.requests,
+                args.concurrency,
+                args.warmup,
+            )
+            results[scenario.name] = result
+            print(
+                f"{scenario.name:<26} p50 {result['p50_ms']:>8.2f}  "
+                f"p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f} ms  "
+                f"{result['throughput_rps']:>8.0f} rps  errors {result['errors']}",
+                file=sys.stderr,
+            )
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "target": args.url or "in-process",
+            "posts": args.posts,
+            "comments_per_post": args.comments_per_post,
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "response_cache": not args.no_cache,
+        },
+        "results": results,
+    }
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser):
+    """Options read by prepare(), shared with the other load scripts."""
+    parser.add_argument("--backend", choices=["mongod", "memory"], default="mongod")
+    parser.add_argument("--mongodb-url", help="defaults to MONGODB_URL")
+    parser.add_argument("--database", default="blog_bench")
+    parser.add_argument("--posts", type=int, default=10_000)
+    parser.add_argument("--comments-per-post", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--url", help="benchmark a running server instead")
+
+
+def open_client(url: Optional[str]) -> httpx.AsyncClient:
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=60)
+    from main import app
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument("--requests", type=int, default=500, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50, help="per scenario")
+    parser.add_argument("--scenario", action="append", help="repeatable; default all")
+    parser.add_argument("--writes", action="store_true", help="include writes")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="disable the response cache"
+    )
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="fraction p95 may rise (or throughput drop) before failing --compare",
+    )
+    args = parser.parse_args()
+    if args.backend == "memory" and args.url:
+        parser.error("--backend memory only works in-process")
+
+    report = asyncio.run(main_async(args))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+    else:
+        print(rendered)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
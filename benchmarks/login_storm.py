@@ -0,0 +1,174 @@
+"""Check that /api/posts latency holds up while logins hammer the server.
+
+Runs readers against /api/posts for --duration seconds, first alone and then
+alongside --logins clients posting to /auth/jwt/login as fast as they can, and
+compares reader p50/p95/p99 between the two phases. Password hashing runs on
+its own thread pool, so the storm should barely move the readers; to see the
+difference, run it again with hashing back on the event loop:
+
+    python -m benchmarks.login_storm --backend memory --posts 1000
+    PASSWORD_HASH_WORKERS=0 python -m benchmarks.login_storm --backend memory \\
+        --posts 1000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from typing import List
+
+import httpx
+from fastapi_users.db import BeanieUserDatabase
+from fastapi_users.exceptions import UserAlreadyExists
+
+from app.auth.user_manager import UserManager
+from app.config import settings
+from app.models.user import User
+from app.schemas.user import UserCreate
+from benchmarks.load import add_dataset_arguments, open_client, prepare, summarize
+
+
+def credentials(index: int):
+    return f"storm{index}@example.com", f"storm-password-{index}"
+
+
+async def create_users(count: int):
+    manager = UserManager(BeanieUserDatabase(User))
+    for index in range(count):
+        email, password = credentials(index)
+        try:
+            await manager.create(
+                UserCreate(email=email, password=password, username=f"storm{index}")
+            )
+        except UserAlreadyExists:
+            pass
+
+
+async def hammer(
+    client: httpx.AsyncClient,
+    request,
+    deadline: float,
+    latencies: List[float],
+    statuses: Counter,
+):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            status = str((await request(client)).status_code)
+        except Exception as exc:
+            status = type(exc).__name__
+        latencies.append(time.perf_counter() - start)
+        statuses[status] += 1
+
+
+async def phase(
+    client: httpx.AsyncClient,
+    readers: int,
+    logins: int,
+    users: int,
+    duration: float,
+):
+    read_latencies: List[float] = []
+    read_statuses: Counter = Counter()
+    login_latencies: List[float] = []
+    login_statuses: Counter = Counter()
+    deadline = time.perf_counter() + duration
+    attempt = 0
+
+    async def read(client):
+        return await client.get("/api/posts")
+
+    async def login(client):
+        nonlocal attempt
+        attempt += 1
+        email, password = credentials(attempt % users)
+        return await client.post(
+            "/auth/jwt/login", data={"username": email, "password": password}
+        )
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            hammer(client, read, deadline, read_latencies, read_statuses)
+            for _ in range(readers)
+        ),
+        *(
+            hammer(client, login, deadline, login_latencies, login_statuses)
+            for _ in range(logins)
+        ),
+    )
+    elapsed = time.perf_counter() - start
+    result = {"reads": summarize(read_latencies, read_statuses, elapsed)}
+    if logins:
+        result["logins"] = summarize(login_latencies, login_statuses, elapsed)
+    return result
+
+
+async def main_async(args) -> dict:
+    await prepare(args)
+    await create_users(args.users)
+    async with open_client(args.url) as client:
+        await phase(client, args.readers, 0, args.users, 1.0)
+        baseline = await phase(client, args.readers, 0, args.users, args.duration)
+        storm = await phase(
+            client, args.readers, args.logins, args.users, args.duration
+        )
+
+    for name, result in (("baseline", baseline), ("storm", storm)):
+        reads = result["reads"]
+        print(
+            f"{name:<9} /api/posts p50 {reads['p50_ms']:>8.2f}  "
+            f"p95 {reads['p95_ms']:>8.2f}  p99 {reads['p99_ms']:>8.2f} ms  "
+            f"{reads['throughput_rps']:>7.0f} rps",
+            file=sys.stderr,
+        )
+    logins = storm["logins"]
+    print(
+        f"logins    p50 {logins['p50_ms']:.2f} ms, {logins['throughput_rps']:.0f}/s, "
+        f"statuses {logins['statuses']}",
+        file=sys.stderr,
+    )
+    return {
+        "meta": {
+            "backend": args.backend,
+            "target": args.url or "in-process",
+            "readers": args.readers,
+            "logins": args.logins,
+            "duration": args.duration,
+            "password_hash_algorithm": settings.password_hash_algorithm,
+            "password_hash_workers": settings.password_hash_workers,
+            "password_hash_queue": settings.password_hash_queue,
+        },
+        "baseline": baseline,
+        "storm": storm,
+        "p99_ratio": round(storm["reads"]["p99_ms"] / baseline["reads"]["p99_ms"], 2)
+        if baseline["reads"]["p99_ms"]
+        else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_dataset_arguments(parser)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="per phase")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+    if args.backend == "memory" and args.url:
+        parser.error("--backend memory only works in-process")
+
+    report = asyncio.run(main_async(args))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered + "\n")
+    else:
+        print(rendered)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare the old and new rendering paths for a page of /api/posts?size=100.
+
+The old path validated every PostSummary, ran jsonable_encoder over the page
+and dumped it with the stdlib json module (what JSONResponse does). The new
+path builds summaries with model_construct and serializes them with
+pydantic-core in one pass. No database is needed:
+
+    python -m benchmarks.serialization --size 100 --rounds 2000
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.responses import render_json
+from app.schemas.pagination import PaginatedResponse
+from app.schemas.post import PostSummary
+
+
+def fake_summaries(size: int):
+    now = datetime.utcnow()
+    return [
+        {
+            "id": str(ObjectId()),
+            "title": f"Post number {i} about asynchronous Python",
+            "excerpt": "Lorem ipsum dolor sit amet, " * 7,
+            "author_id": str(ObjectId()),
+            "author_name": "admin",
+            "category_name": "Tech",
+            "tags": ["python", "async", "fastapi"],
+            "published": True,
+            "comment_count": i,
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+        }
+        for i in range(size)
+    ]
+
+
+def page(items):
+    return PaginatedResponse(
+        items=items, total=10_000, page=1, size=len(items), pages=100
+    )
+
+
+def old_path(documents):
+    items = [PostSummary(**document) for document in documents]
+    return JSONResponse(content=jsonable_encoder(page(items))).body
+
+
+def new_path(documents):
+    items = [PostSummary.model_construct(**document) for document in documents]
+    return render_json(page(items), exclude_unset=True)
+
+
+def measure(label: str, render, documents, rounds: int) -> float:
+    render(documents)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render(documents)
+    elapsed = time.perf_counter() - start
+    per_page = elapsed / rounds
+    print(f"{label:>5}: {per_page * 1000:8.3f} ms/page  {1 / per_page:10.0f} pages/s")
+    return per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    documents = fake_summaries(args.size)
+    old = measure("old", old_path, documents, args.rounds)
+    new = measure("new", new_path, documents, args.rounds)
+    print(f"speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,20 @@
 import pathlib
 from contextlib import asynccontextmanager
+from typing import Literal
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 
-from app.auth.user_manager import auth_backend, fastapi_users
+from app.auth.user_manager import auth_backend, current_superuser, fastapi_users
+from app.config import settings
 from app.database.connection import close_db, init_db
-from app.routers import categories, posts, stats
+from app.database.monitoring import driver_metrics
+from app.database.profiler import ProfilingMiddleware, query_profiler
+from app.metrics import MetricsMiddleware, mark_process_dead, render_metrics
+from app.models.user import User
+from app.routers import authors, categories, posts, stats
 from app.schemas.user import UserCreate, UserRead
 
 
@@ -19,6 +25,7 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     await close_db()
+    mark_process_dead()
 
 
 app = FastAPI(title="Blog System API", version="1.0.0", lifespan=lifespan)
@@ -31,6 +38,11 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+app.add_middleware(MetricsMiddleware)
+
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -53,6 +65,7 @@ app.include_router(
 app.include_router(posts.router, prefix="/api", tags=["posts"])
 app.include_router(categories.router, prefix="/api", tags=["categories"])
 app.include_router(stats.router, prefix="/api", tags=["stats"])
+app.include_router(authors.router, prefix="/api", tags=["authors"])
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -64,3 +77,27 @@ async def read_root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/health/mongo")
+async def mongo_metrics():
+    """Driver pool and per-command latency figures, for sizing the pool."""
+    return driver_metrics.snapshot()
+
+
+@app.get("/health/mongo/slow")
+async def slow_queries(
+    limit: int = Query(10, ge=1, le=100),
+    order: Literal["total", "max", "count"] = "total",
+    user: User = Depends(current_superuser),
+):
+    """Slowest query shapes with their plans, and the latest slow requests.
+    Empty unless PROFILING_ENABLED is set; superusers only, as the plans and
+    request paths expose how the data is laid out and queried."""
+    return query_profiler.snapshot(limit, order)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from beanie import init_beanie
+
+from app.config import settings
+from app.database.connection import DOCUMENT_MODELS, create_client
+from app.database.indexes import reconcile_indexes
+from app.services.bulk_service import BulkService
+from app.services.feed_service import FeedService
+from app.services.stats_service import StatsService
+from app.services.streaming import encode_items
+
+
+async def indexes(args):
+    report = await reconcile_indexes(DOCUMENT_MODELS, build=args.build)
+    print(json.dumps(report, indent=2))
+
+
+async def rebuild_stats(args):
+    if not await StatsService.rebuild():
+        print("Another process is rebuilding the stats counters", file=sys.stderr)
+        sys.exit(1)
+    print("Stats counters rebuilt")
+    fixed = await FeedService.recount_followers()
+    print(f"Follower counts recounted, {fixed} corrected")
+
+
+async def _read_lines(path: str):
+    with open(
+        sys.stdin.fileno() if path == "-" else path, "rb", closefd=path != "-"
+    ) as f:
+        for line in f:
+            yield line
+
+
+async def import_posts(args):
+    report = await BulkService.import_posts(
+        _read_lines(args.path),
+        batch_size=args.batch_size,
+        rebuild_stats=not args.skip_stats,
+    )
+    print(report.model_dump_json(indent=2))
+
+
+async def export_posts(args):
+    published = {"all": None, "published": True, "drafts": False}[args.posts]
+    with open(
+        sys.stdout.fileno() if args.path == "-" else args.path,
+        "w",
+        closefd=args.path != "-",
+    ) as f:
+        records = BulkService.export_posts(published, args.batch_size)
+        async for chunk in encode_items(records):
+            f.write(chunk)
+
+
+async def run(args):
+    client = create_client()
+    await init_beanie(
+        database=client[settings.database_name],
+        document_models=DOCUMENT_MODELS,
+        skip_indexes=True,
+    )
+    try:
+        await args.handler(args)
+    finally:
+        await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blog maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    indexes_parser = commands.add_parser(
+        "indexes", help="Compare declared and existing indexes"
+    )
+    indexes_parser.add_argument(
+        "--build", action="store_true", help="Create missing indexes"
+    )
+    indexes_parser.set_defaults(handler=indexes)
+
+    rebuild_parser = commands.add_parser(
+        "rebuild-stats",
+        help="Recompute the /api/stats counters and follower counts from scratch",
+    )
+    rebuild_parser.set_defaults(handler=rebuild_stats)
+
+    import_parser = commands.add_parser(
+        "import-posts", help="Upsert posts and comments from an NDJSON file"
+    )
+    import_parser.add_argument("path", help="NDJSON file, or - for stdin")
+    import_parser.add_argument(
+        "--batch-size", type=int, default=settings.bulk_batch_size
+    )
+    import_parser.add_argument(
+        "--skip-stats",
+        action="store_true",
+        help="Do not rebuild the stats counters afterwards",
+    )
+    import_parser.set_defaults(handler=import_posts)
+
+    export_parser = commands.add_parser(
+        "export-posts", help="Write posts and their comments as NDJSON"
+    )
+    export_parser.add_argument("path", help="Output file, or - for stdout")
+    export_parser.add_argument(
+        "--posts", choices=["all", "published", "drafts"], default="all"
+    )
+    export_parser.add_argument(
+        "--batch-size", type=int, default=settings.bulk_batch_size
+    )
+    export_parser.set_defaults(handler=export_posts)
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
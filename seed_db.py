@@ -3,7 +3,7 @@ import asyncio
 from beanie import init_beanie
 from fastapi_users.exceptions import UserAlreadyExists
 from fastapi_users_db_beanie import BeanieUserDatabase
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 
 from app.auth.user_manager import UserManager
 from app.config import settings
@@ -12,7 +12,7 @@ from app.schemas.user import UserCreate
 
 
 async def seed_users():
-    client = AsyncIOMotorClient(settings.mongodb_url)
+    client = AsyncMongoClient(settings.mongodb_url)
     db = client[settings.database_name]
 
     await init_beanie(db, document_models=[User])
@@ -40,7 +40,7 @@ import asyncio
 from datetime import datetime
 
 from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 
 from app.config import settings
 from app.models.category import Category
@@ -103,7 +103,7 @@ COMMENTS = [
 
 
 async def seed_content():
-    client = AsyncIOMotorClient(settings.mongodb_url)
+    client = AsyncMongoClient(settings.mongodb_url)
     db = client[settings.database_name]
 
     await init_beanie(
@@ -3,7 +3,9 @@ const API_BASE = 'http://localhost:8000';
 let state = {
     token: localStorage.getItem('token'),
     user: null,
-    currentPage: 1
+    currentPage: 1,
+    nextCursor: null,
+    commentsCursor: null
 };
 
 async function apiCall(endpoint, options = {}) {
@@ -140,8 +142,45 @@ async function handleRegister(e) {
     }
 }
 
+function renderPostCard(post) {
+    return `
+        <div class="col-md-6 mb-4">
+            <div class="card post-card h-100">
+                <div class="card-body">
+                    <h5 class="card-title">${post.title}</h5>
+                    <p class="card-text">${post.excerpt.substring(0, 150)}...</p>
+                    <div class="mb-2">
+                        ${post.tags.map(t => `<span class="badge bg-secondary badge-tag" onclick="filterByTag('${t}')" title="Клікніть, щоб побачити всі пости з цим тегом">${t}</span>`).join('')}
+                    </div>
+                    <p class="text-muted small">
+                        <i class="bi bi-person"></i> ${post.author_name} | 
+                        <i class="bi bi-calendar"></i> ${new Date(post.created_at).toLocaleDateString('uk-UA')}
+                        ${post.category_name ? ` | <i class="bi bi-folder"></i> ${post.category_name}` : ''}
+                    </p>
+                    <button class="btn btn-primary btn-sm" onclick="showPost('${post.id}')">Читати</button>
+                </div>
+            </div>
+        </div>
+    `;
+}
+
+function updateLoadMore() {
+    const button = document.getElementById('loadMore');
+    if (button) button.classList.toggle('d-none', !state.nextCursor);
+}
+
+async function loadMorePosts() {
+    if (!state.nextCursor) return;
+    const posts = await apiCall(`/api/posts?size=10&cursor=${encodeURIComponent(state.nextCursor)}`);
+    document.getElementById('postsGrid').insertAdjacentHTML('beforeend', posts.items.map(renderPostCard).join(''));
+    state.nextCursor = posts.next_cursor;
+    updateLoadMore();
+}
+
 async function showHome() {
-    const posts = await apiCall('/api/posts?page=1&size=10');
+    // Keyset pagination: every "load more" costs the same as the first page.
+    const posts = await apiCall('/api/posts?size=10&cursor=');
+    state.nextCursor = posts.next_cursor;
     const categories = await apiCall('/api/categories');
 
     let html = `
@@ -159,38 +198,40 @@ async function showHome() {
                 </select>
             </div>
         </div>
-        <div class="row">
+        <div class="row" id="postsGrid">
+            ${posts.items.map(renderPostCard).join('')}
+        </div>
+        <div class="text-center mb-4">
+            <button class="btn btn-outline-primary d-none" id="loadMore" onclick="loadMorePosts()">Завантажити ще</button>
+        </div>
     `;
 
-    posts.items.forEach(post => {
-        html += `
-            <div class="col-md-6 mb-4">
-                <div class="card post-card h-100">
-                    <div class="card-body">
-                        <h5 class="card-title">${post.title}</h5>
-                        <p class="card-text">${post.content.substring(0, 150)}...</p>
-                        <div class="mb-2">
-                            ${post.tags.map(t => `<span class="badge bg-secondary badge-tag" onclick="filterByTag('${t}')" title="Клікніть, щоб побачити всі пости з цим тегом">${t}</span>`).join('')}
-                        </div>
-                        <p class="text-muted small">
-                            <i class="bi bi-person"></i> ${post.author_name} | 
-                            <i class="bi bi-calendar"></i> ${new Date(post.created_at).toLocaleDateString('uk-UA')}
-                            ${post.category_name ? ` | <i class="bi bi-folder"></i> ${post.category_name}` : ''}
-                        </p>
-                        <button class="btn btn-primary btn-sm" onclick="showPost('${post.id}')">Читати</button>
-                    </div>
-                </div>
-            </div>
-        `;
-    });
-
-    html += '</div>';
     document.getElementById('content').innerHTML = html;
+    updateLoadMore();
+}
+
+function renderComment(c) {
+    return `
+        <div class="comment-item">
+            <strong>${c.author}</strong>
+            <small class="text-muted">${new Date(c.created_at).toLocaleDateString('uk-UA')}</small>
+            <p>${c.content}</p>
+        </div>
+    `;
+}
+
+async function loadMoreComments(postId) {
+    if (!state.commentsCursor) return;
+    const comments = await apiCall(`/api/posts/${postId}/comments?size=20&cursor=${encodeURIComponent(state.commentsCursor)}`);
+    document.getElementById('commentsList').insertAdjacentHTML('beforeend', comments.items.map(renderComment).join(''));
+    state.commentsCursor = comments.next_cursor;
+    document.getElementById('loadMoreComments').classList.toggle('d-none', !state.commentsCursor);
 }
 
 async function showPost(id) {
     const post = await apiCall(`/api/posts/${id}`);
-    const comments = await apiCall(`/api/posts/${id}/comments`);
+    const comments = await apiCall(`/api/posts/${id}/comments?size=20`);
+    state.commentsCursor = comments.next_cursor;
 
     let html = `
         <div class="card mb-4">
@@ -211,14 +252,11 @@ async function showPost(id) {
 
         <div class="card">
             <div class="card-body">
-                <h4>Коментарі (${comments.length})</h4>
-                ${comments.map(c => `
-                    <div class="comment-item">
-                        <strong>${c.author}</strong>
-                        <small class="text-muted">${new Date(c.created_at).toLocaleDateString('uk-UA')}</small>
-                        <p>${c.content}</p>
-                    </div>
-                `).join('')}
+                <h4>Коментарі (${post.comment_count})</h4>
+                <div id="commentsList">
+                    ${comments.items.map(renderComment).join('')}
+                </div>
+                <button class="btn btn-outline-secondary btn-sm ${state.commentsCursor ? '' : 'd-none'}" id="loadMoreComments" onclick="loadMoreComments('${id}')">Більше коментарів</button>
                 
                 <hr>
                 <h5>Додати коментар</h5>
@@ -295,27 +333,7 @@ function displayPosts(posts, title = null) {
     html += '<div class="row">';
 
     if (posts.items && posts.items.length > 0) {
-        posts.items.forEach(post => {
-            html += `
-                <div class="col-md-6 mb-4">
-                    <div class="card post-card h-100">
-                        <div class="card-body">
-                            <h5 class="card-title">${post.title}</h5>
-                            <p class="card-text">${post.content.substring(0, 150)}...</p>
-                            <div class="mb-2">
-                                ${post.tags.map(t => `<span class="badge bg-secondary badge-tag" onclick="filterByTag('${t}')" title="Клікніть, щоб побачити всі пости з цим тегом">${t}</span>`).join('')}
-                            </div>
-                            <p class="text-muted small">
-                                <i class="bi bi-person"></i> ${post.author_name} | 
-                                <i class="bi bi-calendar"></i> ${new Date(post.created_at).toLocaleDateString('uk-UA')}
-                                ${post.category_name ? ` | <i class="bi bi-folder"></i> ${post.category_name}` : ''}
-                            </p>
-                            <button class="btn btn-primary btn-sm" onclick="showPost('${post.id}')">Читати</button>
-                        </div>
-                    </div>
-                </div>
-            `;
-        });
+        html += posts.items.map(renderPostCard).join('');
     } else {
         html += `
             <div class="col-12">